@@ -0,0 +1,58 @@
+"""
+Aero — command line tools.
+
+    python -m app.cli db upgrade            # terapkan semua migrasi
+    python -m app.cli db upgrade --to 0003  # s/d versi tertentu
+    python -m app.cli db current            # versi terpasang + pending
+    python -m app.cli db maintain-partitions  # partisi ke depan + detach lama (cron)
+"""
+
+import argparse
+import logging
+
+from app.database import SessionLocal
+from app.migrations import applied_versions, discover, upgrade
+from app.services.partition_service import ensure_partitions, run_maintenance
+
+
+def _db_upgrade(args):
+    done = upgrade(target=args.to)
+    print(f"Migrasi diterapkan: {', '.join(done)}" if done else "Schema sudah terbaru.")
+    with SessionLocal() as db:
+        created = ensure_partitions(db)
+    if created:
+        print(f"Partisi dibuat: {', '.join(created)}")
+
+
+def _db_current(args):
+    applied = applied_versions()
+    for migration in discover():
+        mark = "x" if migration.version in applied else " "
+        print(f"[{mark}] {migration.version}  {migration.description}")
+
+
+def _db_maintain_partitions(args):
+    created, detached = run_maintenance()
+    print(f"Partisi dibuat: {', '.join(created) or '-'}")
+    print(f"Partisi di-detach: {', '.join(detached) or '-'}")
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="aero", description="Aero command line tools")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    db = commands.add_parser("db", help="Schema database").add_subparsers(dest="db_command", required=True)
+    db_upgrade = db.add_parser("upgrade", help="Terapkan migrasi yang belum jalan")
+    db_upgrade.add_argument("--to", default=None, help="Versi target (default: terbaru)")
+    db_upgrade.set_defaults(func=_db_upgrade)
+    db.add_parser("current", help="Tampilkan status migrasi").set_defaults(func=_db_current)
+    db.add_parser("maintain-partitions", help="Buat partisi ke depan + detach partisi lama") \
+        .set_defaults(func=_db_maintain_partitions)
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,71 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
 
 from app.config import settings
 
-engine = create_engine(settings.DATABASE_URL)
+# Driver async pengganti driver sync per backend
+_ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+
+def _pool_kwargs(url: str) -> dict:
+    """Ukuran pool dari Settings (SQLite memakai pool bawaan)."""
+    if make_url(url).get_backend_name() == "sqlite":
+        return {}
+    return {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": True,
+    }
+
+
+def async_database_url(url: str) -> str:
+    """DATABASE_URL dengan driver async, e.g. postgresql:// -> postgresql+asyncpg://."""
+    parsed = make_url(url)
+    driver = _ASYNC_DRIVERS.get(parsed.get_backend_name())
+    if driver is None:
+        return url
+    return parsed.set(drivername=driver).render_as_string(hide_password=False)
+
+
+def _async_engine(url: str):
+    """(engine, sessionmaker) async, atau (None, None) jika driver async tidak ter-install."""
+    try:
+        async_eng = create_async_engine(url, **_pool_kwargs(url))
+    except ImportError:  # optional dependency
+        return None, None
+    return async_eng, async_sessionmaker(async_eng, class_=AsyncSession,
+                                         autoflush=False, expire_on_commit=False)
+
+
+engine = create_engine(settings.DATABASE_URL, **_pool_kwargs(settings.DATABASE_URL))
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+# Engine baca (replica). READ_DATABASE_URL kosong = pakai primary.
+if settings.READ_DATABASE_URL:
+    read_engine = create_engine(settings.READ_DATABASE_URL, **_pool_kwargs(settings.READ_DATABASE_URL))
+    ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+else:
+    read_engine = engine
+    ReadSessionLocal = SessionLocal
+
+# Engine async untuk endpoint baca (asyncpg). Driver-nya opsional: tanpa
+# asyncpg / aiosqlite, endpoint sync tetap jalan dan get_async_db gagal jelas.
+_async_url = settings.ASYNC_DATABASE_URL or async_database_url(settings.DATABASE_URL)
+async_engine, AsyncSessionLocal = _async_engine(_async_url)
+if settings.ASYNC_READ_DATABASE_URL or settings.READ_DATABASE_URL:
+    _async_read_url = settings.ASYNC_READ_DATABASE_URL or async_database_url(settings.READ_DATABASE_URL)
+    async_read_engine, AsyncReadSessionLocal = _async_engine(_async_read_url)
+else:
+    async_read_engine, AsyncReadSessionLocal = async_engine, AsyncSessionLocal
+
 
 def get_db():
     """FastAPI dependency: yields a DB session and closes it after use."""
@@ -15,3 +74,33 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+def get_read_db():
+    """Seperti get_db, tapi ke replica (READ_DATABASE_URL) untuk endpoint read-only."""
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def async_session(read: bool = False) -> AsyncSession:
+    """AsyncSession baru (pakai `async with`). Raise RuntimeError jika driver async tidak ada."""
+    factory = AsyncReadSessionLocal if read else AsyncSessionLocal
+    if factory is None:
+        raise RuntimeError(f"Driver async untuk {_async_url.split(':', 1)[0]} belum ter-install "
+                           "(pip install asyncpg)")
+    return factory()
+
+
+async def get_async_db():
+    """FastAPI dependency: yields an AsyncSession and closes it after use."""
+    async with async_session() as db:
+        yield db
+
+
+async def get_async_read_db():
+    """Seperti get_async_db, tapi ke replica (READ_DATABASE_URL)."""
+    async with async_session(read=True) as db:
+        yield db
@@ -4,20 +4,43 @@ Aero — Flight Price Scraper API
 FastAPI application entry point.
 """
 
+import logging
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-from app.database import engine, Base
+from app.database import async_engine, async_read_engine, read_engine, engine
+from app.migrations import pending_migrations
 from app.routers import flights
+from app.scrapers.client import scraper_client
+from app.config import settings
+from app.services.job_service import job_worker
+from app.services.scheduler_service import scheduler
+
+logger = logging.getLogger(__name__)
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    """Create tables on startup."""
-    Base.metadata.create_all(bind=engine)
+    """Start job workers / scheduler on startup, stop them on shutdown (schema: `python -m app.cli db upgrade`)."""
+    pending = pending_migrations()
+    if pending:
+        logger.warning("Ada %d migrasi belum diterapkan (%s), jalankan `python -m app.cli db upgrade`",
+                       len(pending), ", ".join(m.version for m in pending))
+    job_worker.start()
+    if settings.SCHEDULER_ENABLED:
+        scheduler.start()
     yield
+    scheduler.stop(timeout=5)
+    job_worker.stop(timeout=5)
+    scraper_client.close()
+    if read_engine is not engine:
+        read_engine.dispose()
+    if async_engine is not None:
+        await async_engine.dispose()
+    if async_read_engine not in (None, async_engine):
+        await async_read_engine.dispose()
 
 
 app = FastAPI(
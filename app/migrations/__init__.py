@@ -0,0 +1,10 @@
+"""
+Migrasi schema berversi. Jalankan dengan:
+
+    python -m app.cli db upgrade
+
+Startup aplikasi tidak mengubah schema; hanya memberi peringatan jika masih
+ada migrasi yang belum diterapkan.
+"""
+
+from app.migrations.runner import applied_versions, discover, pending_migrations, upgrade  # noqa: F401
@@ -0,0 +1,209 @@
+"""
+runner.py — Menjalankan migrasi schema berversi (app/migrations/vNNNN_*.py).
+
+Setiap modul migrasi berisi:
+
+    \"\"\"Deskripsi 1 baris.\"\"\"
+    TRANSACTIONAL = True        # False: dijalankan autocommit (CREATE INDEX CONCURRENTLY)
+    POSTGRESQL_ONLY = True      # False: juga dijalankan di SQLite (dev)
+
+    def upgrade(conn): ...
+
+Versi yang sudah jalan dicatat di tabel schema_migrations. Migrasi harus
+idempoten (IF NOT EXISTS, cek katalog) karena v0001 membuat tabel dari
+model terbaru untuk database baru.
+"""
+
+import importlib
+import logging
+import os
+import pkgutil
+from dataclasses import dataclass
+from types import ModuleType
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.orm import Session
+
+from app.database import engine as default_engine
+
+logger = logging.getLogger(__name__)
+
+# Key pg_advisory_lock supaya 2 deploy tidak menjalankan upgrade bersamaan
+_LOCK_KEY = 0x4145524F  # "AERO"
+
+_VERSION_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS schema_migrations (
+        version VARCHAR(16) PRIMARY KEY,
+        description VARCHAR(200),
+        applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+"""
+
+
+@dataclass
+class Migration:
+    version: str
+    description: str
+    module: ModuleType
+
+    @property
+    def transactional(self) -> bool:
+        return getattr(self.module, "TRANSACTIONAL", True)
+
+    @property
+    def postgresql_only(self) -> bool:
+        return getattr(self.module, "POSTGRESQL_ONLY", True)
+
+
+def discover() -> list[Migration]:
+    """Semua modul vNNNN_* di app/migrations, urut versi."""
+    found = []
+    for info in pkgutil.iter_modules([os.path.dirname(__file__)]):
+        if not info.name.startswith("v") or "_" not in info.name:
+            continue
+        module = importlib.import_module(f"{__package__}.{info.name}")
+        version = info.name[1:].split("_", 1)[0]
+        description = (module.__doc__ or info.name).strip().splitlines()[0]
+        found.append(Migration(version, description, module))
+    return sorted(found, key=lambda m: m.version)
+
+
+def applied_versions(engine: Engine | None = None) -> set[str]:
+    """Versi yang sudah diterapkan (read-only, aman dipanggil saat startup)."""
+    engine = engine or default_engine
+    with engine.connect() as conn:
+        if not inspect(conn).has_table("schema_migrations"):
+            return set()
+        return {v for (v,) in conn.execute(text("SELECT version FROM schema_migrations"))}
+
+
+def pending_migrations(engine: Engine | None = None) -> list[Migration]:
+    applied = applied_versions(engine)
+    return [m for m in discover() if m.version not in applied]
+
+
+def _record(conn: Connection, migration: Migration):
+    conn.execute(
+        text("INSERT INTO schema_migrations (version, description) VALUES (:v, :d)"),
+        {"v": migration.version, "d": migration.description[:200]},
+    )
+
+
+def _apply(engine: Engine, migration: Migration):
+    run = engine.dialect.name == "postgresql" or not migration.postgresql_only
+    if run and not migration.transactional:
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            migration.module.upgrade(conn)
+    with engine.begin() as conn:
+        if run and migration.transactional:
+            migration.module.upgrade(conn)
+        _record(conn, migration)
+
+
+def upgrade(engine: Engine | None = None, target: str | None = None) -> list[str]:
+    """
+    Jalankan semua migrasi yang belum diterapkan (s/d `target` jika diisi).
+
+    Migrasi POSTGRESQL_ONLY di backend lain hanya dicatat (schema SQLite
+    sepenuhnya dibuat v0001 dari model).
+
+    Returns:
+        list versi yang diterapkan.
+    """
+    engine = engine or default_engine
+    lock_conn = None
+    if engine.dialect.name == "postgresql":
+        lock_conn = engine.connect().execution_options(isolation_level="AUTOCOMMIT")
+        lock_conn.execute(text("SELECT pg_advisory_lock(:key)"), {"key": _LOCK_KEY})
+    try:
+        with engine.begin() as conn:
+            conn.execute(text(_VERSION_TABLE_SQL))
+        done = []
+        for migration in pending_migrations(engine):
+            if target and migration.version > target:
+                break
+            logger.info("Migrasi %s: %s", migration.version, migration.description)
+            _apply(engine, migration)
+            done.append(migration.version)
+        return done
+    finally:
+        if lock_conn is not None:
+            lock_conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": _LOCK_KEY})
+            lock_conn.close()
+
+
+# =============================================
+# Helper untuk modul migrasi (PostgreSQL)
+# =============================================
+
+# is_partitioned / partitions juga dipakai partition_service (Connection atau Session)
+
+def is_partitioned(conn: Connection | Session, table: str) -> bool:
+    return conn.execute(text(
+        "SELECT 1 FROM pg_partitioned_table pt JOIN pg_class c ON c.oid = pt.partrelid "
+        "WHERE c.relname = :table"
+    ), {"table": table}).first() is not None
+
+
+def partitions(conn: Connection | Session, table: str) -> list[str]:
+    """Nama partisi tabel (relkind 'r', tanpa index partisi / sub-partisi)."""
+    return [name for (name,) in conn.execute(text(
+        "SELECT c.relname FROM pg_inherits i "
+        "JOIN pg_class c ON c.oid = i.inhrelid "
+        "JOIN pg_class p ON p.oid = i.inhparent "
+        "WHERE p.relname = :table AND c.relkind = 'r'"
+    ), {"table": table})]
+
+
+def _index_state(conn: Connection, name: str) -> bool | None:
+    """True = valid, False = ada tapi invalid (CONCURRENTLY gagal), None = belum ada."""
+    row = conn.execute(text(
+        "SELECT i.indisvalid FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+        "WHERE c.relname = :name"
+    ), {"name": name}).first()
+    return None if row is None else row[0]
+
+
+def _attached_index(conn: Connection, parent_index: str, partition: str) -> bool:
+    return conn.execute(text(
+        "SELECT 1 FROM pg_inherits i "
+        "JOIN pg_class ci ON ci.oid = i.inhrelid "
+        "JOIN pg_index x ON x.indexrelid = ci.oid "
+        "JOIN pg_class t ON t.oid = x.indrelid "
+        "JOIN pg_class cp ON cp.oid = i.inhparent "
+        "WHERE cp.relname = :parent AND t.relname = :partition"
+    ), {"parent": parent_index, "partition": partition}).first() is not None
+
+
+def _create_concurrently(conn: Connection, name: str, table: str, definition: str):
+    if _index_state(conn, name) is False:
+        conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {name}"))
+    conn.execute(text(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {table} {definition}"))
+
+
+def create_index_concurrently(conn: Connection, name: str, table: str, definition: str):
+    """
+    CREATE INDEX tanpa mengunci tulis (koneksi harus AUTOCOMMIT).
+
+    Tabel partisi tidak mendukung CONCURRENTLY langsung: index parent dibuat
+    `ON ONLY` (invalid), tiap partisi di-index CONCURRENTLY lalu di-ATTACH;
+    parent otomatis valid setelah semua partisi ter-attach.
+
+    Args:
+        definition: bagian setelah nama tabel, e.g. "(route, travel_date) WHERE ..."
+                    atau "USING gin (airline gin_trgm_ops)"
+    """
+    if not is_partitioned(conn, table):
+        _create_concurrently(conn, name, table, definition)
+        return
+
+    if _index_state(conn, name):
+        return
+    conn.execute(text(f"CREATE INDEX IF NOT EXISTS {name} ON ONLY {table} {definition}"))
+    for partition in partitions(conn, table):
+        if _attached_index(conn, name, partition):
+            continue
+        partition_index = f"{partition}_{name.removeprefix('idx_')}"[:63]
+        _create_concurrently(conn, partition_index, partition, definition)
+        conn.execute(text(f"ALTER INDEX {name} ATTACH PARTITION {partition_index}"))
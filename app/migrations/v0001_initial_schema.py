@@ -0,0 +1,12 @@
+"""Buat tabel yang belum ada dari model (database baru / tabel baru)."""
+
+from app.database import Base
+import app.models.flight  # noqa: F401  (registrasi model ke Base.metadata)
+
+TRANSACTIONAL = True
+POSTGRESQL_ONLY = False
+
+
+def upgrade(conn):
+    # checkfirst: tabel lama tidak disentuh, kolom/index barunya diurus migrasi berikutnya
+    Base.metadata.create_all(bind=conn)
@@ -0,0 +1,17 @@
+"""Kolom antrian job & progress di scrape_runs."""
+
+from sqlalchemy import text
+
+TRANSACTIONAL = True
+POSTGRESQL_ONLY = True
+
+
+def upgrade(conn):
+    conn.execute(text("""
+        ALTER TABLE scrape_runs
+            ADD COLUMN IF NOT EXISTS start_date DATE,
+            ADD COLUMN IF NOT EXISTS end_date DATE,
+            ADD COLUMN IF NOT EXISTS total_tasks INTEGER DEFAULT 0,
+            ADD COLUMN IF NOT EXISTS completed_tasks INTEGER DEFAULT 0,
+            ADD COLUMN IF NOT EXISTS error_reason TEXT
+    """))
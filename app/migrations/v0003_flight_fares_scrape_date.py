@@ -0,0 +1,17 @@
+"""Kolom flight_fares.scrape_date (partition key), diisi dari scrape_runs."""
+
+from sqlalchemy import text
+
+TRANSACTIONAL = True
+POSTGRESQL_ONLY = True
+
+
+def upgrade(conn):
+    conn.execute(text("ALTER TABLE flight_fares ADD COLUMN IF NOT EXISTS scrape_date DATE"))
+    conn.execute(text("""
+        UPDATE flight_fares f
+        SET scrape_date = r.scrape_date
+        FROM scrape_runs r
+        WHERE r.run_id = f.run_id AND f.scrape_date IS NULL
+    """))
+    conn.execute(text("ALTER TABLE flight_fares ALTER COLUMN scrape_date SET NOT NULL"))
@@ -0,0 +1,50 @@
+"""Ubah flight_fares & fare_daily_summary menjadi tabel partisi bulanan per scrape_date.
+
+Tabel lama tidak disalin: ia di-rename lalu di-ATTACH sebagai partisi DEFAULT
+dari tabel parent baru, sehingga history tetap terbaca tanpa memindahkan
+baris. Bulan-bulan berikutnya masuk partisi bulanan (partition_service).
+Index tabel lama dibangun ulang saat ATTACH: jalankan di jendela maintenance
+untuk tabel besar.
+"""
+
+from sqlalchemy import text
+
+from app.migrations.runner import is_partitioned
+from app.models.flight import FlightFare, FareDailySummary
+
+TRANSACTIONAL = True
+POSTGRESQL_ONLY = True
+
+
+def _convert(conn, table):
+    name = table.name
+    legacy = f"{name}_legacy"
+    conn.execute(text(f"ALTER TABLE {name} RENAME TO {legacy}"))
+
+    # Nama PK / index lama bentrok dengan milik parent baru; FK diwarisi dari parent
+    for (constraint,) in conn.execute(text(
+        "SELECT conname FROM pg_constraint WHERE conrelid = CAST(:t AS regclass) AND contype IN ('p', 'u', 'f')"
+    ), {"t": legacy}).all():
+        conn.execute(text(f'ALTER TABLE {legacy} DROP CONSTRAINT "{constraint}"'))
+    for (index,) in conn.execute(text(
+        "SELECT indexname FROM pg_indexes WHERE tablename = :t"
+    ), {"t": legacy}).all():
+        conn.execute(text(f'DROP INDEX "{index}"'))
+
+    # Parent partisi + index + partisi DEFAULT kosong (event after_create)
+    table.create(bind=conn)
+    conn.execute(text(f"DROP TABLE {name}_default"))
+    conn.execute(text(f"ALTER TABLE {legacy} RENAME TO {name}_default"))
+    conn.execute(text(f"ALTER TABLE {name} ATTACH PARTITION {name}_default DEFAULT"))
+
+    # Sequence id parent baru harus melanjutkan id tabel lama
+    conn.execute(text(
+        f"SELECT setval(pg_get_serial_sequence('{name}', 'id'), "
+        f"(SELECT COALESCE(MAX(id), 0) + 1 FROM {name}), false)"
+    ))
+
+
+def upgrade(conn):
+    for table in (FlightFare.__table__, FareDailySummary.__table__):
+        if not is_partitioned(conn, table.name):
+            _convert(conn, table)
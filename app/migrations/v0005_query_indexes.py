@@ -0,0 +1,36 @@
+"""Index untuk pola query /history, summary, fare_triangle & DoD (CONCURRENTLY)."""
+
+from sqlalchemy import text
+
+from app.migrations.runner import create_index_concurrently
+
+TRANSACTIONAL = False
+POSTGRESQL_ONLY = True
+
+SUCCESS_ONLY = "WHERE status_scrape = 'SUCCESS'"
+
+INDEXES = [
+    ("idx_flight_fares_history", "flight_fares",
+     f"(route, travel_date, basic_fare, id) {SUCCESS_ONLY}"),
+    ("idx_flight_fares_run_success", "flight_fares",
+     f"(run_id) INCLUDE (route, airline, travel_date, basic_fare) {SUCCESS_ONLY}"),
+    ("idx_fare_summary_dod", "fare_daily_summary",
+     "(route, airline, travel_date, scrape_date)"),
+    ("idx_scrape_runs_route_status", "scrape_runs",
+     "(route, status, id)"),
+]
+
+
+def upgrade(conn):
+    for name, table, definition in INDEXES:
+        create_index_concurrently(conn, name, table, definition)
+
+    has_trgm = conn.execute(text(
+        "SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'"
+    )).first() is not None
+    if has_trgm:
+        conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        create_index_concurrently(conn, "idx_flight_fares_airline_trgm", "flight_fares",
+                                  "USING gin (airline gin_trgm_ops)")
+    # Digantikan index trigram / idx_flight_fares_history
+    conn.execute(text("DROP INDEX CONCURRENTLY IF EXISTS idx_flight_fares_airline"))
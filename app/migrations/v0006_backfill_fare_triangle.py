@@ -0,0 +1,13 @@
+"""Backfill fare_triangle dari flight_fares jika masih kosong."""
+
+from sqlalchemy.orm import Session
+
+from app.services.triangle_service import ensure_triangle_backfilled
+
+TRANSACTIONAL = True
+POSTGRESQL_ONLY = False
+
+
+def upgrade(conn):
+    with Session(bind=conn) as db:
+        ensure_triangle_backfilled(db)
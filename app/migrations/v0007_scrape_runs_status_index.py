@@ -0,0 +1,11 @@
+"""Index status scrape_runs untuk claim antrian job (CONCURRENTLY)."""
+
+from app.migrations.runner import create_index_concurrently
+
+TRANSACTIONAL = False
+POSTGRESQL_ONLY = True
+
+
+def upgrade(conn):
+    # claim_next_job: WHERE status = 'QUEUED' ORDER BY id ... FOR UPDATE SKIP LOCKED
+    create_index_concurrently(conn, "idx_scrape_runs_status", "scrape_runs", "(status)")
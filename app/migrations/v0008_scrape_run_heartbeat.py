@@ -0,0 +1,10 @@
+"""Kolom lease (heartbeat_at) di scrape_runs untuk mendeteksi run yatim."""
+
+from sqlalchemy import text
+
+TRANSACTIONAL = True
+POSTGRESQL_ONLY = True
+
+
+def upgrade(conn):
+    conn.execute(text("ALTER TABLE scrape_runs ADD COLUMN IF NOT EXISTS heartbeat_at TIMESTAMP"))
@@ -0,0 +1,10 @@
+"""Kolom scrape_runs.completed_at (versi data untuk cache export)."""
+
+from sqlalchemy import text
+
+TRANSACTIONAL = True
+POSTGRESQL_ONLY = True
+
+
+def upgrade(conn):
+    conn.execute(text("ALTER TABLE scrape_runs ADD COLUMN IF NOT EXISTS completed_at TIMESTAMP"))
@@ -0,0 +1,12 @@
+"""Kolom scrape_runs.citilink_requested (job dikirim dengan token Citilink)."""
+
+from sqlalchemy import text
+
+TRANSACTIONAL = True
+POSTGRESQL_ONLY = True
+
+
+def upgrade(conn):
+    conn.execute(text(
+        "ALTER TABLE scrape_runs ADD COLUMN IF NOT EXISTS citilink_requested BOOLEAN DEFAULT false"
+    ))
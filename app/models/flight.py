@@ -1,7 +1,8 @@
 from sqlalchemy import (
     Column, Integer, String, Date, DateTime, Numeric, Boolean, Text, Float,
-    ForeignKey, Index,
+    ForeignKey, Index, DDL, PrimaryKeyConstraint, event, text,
 )
+from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 
@@ -18,9 +19,17 @@ class ScrapeRun(Base):
     scraped_at = Column(DateTime, server_default=func.now())        # timestamp pengambilan
     scrape_date = Column(Date, nullable=False)                      # tanggal pengamatan (dimensi)
     route = Column(String(10), nullable=False)                      # "BTH-CGK"
-    status = Column(String(10), default="RUNNING")                  # RUNNING / COMPLETED / FAILED
+    status = Column(String(10), default="RUNNING")                  # QUEUED / RUNNING / COMPLETED / FAILED
+    start_date = Column(Date)                                       # range tanggal terbang yang di-scrape
+    end_date = Column(Date)
     total_records = Column(Integer, default=0)
     total_errors = Column(Integer, default=0)
+    total_tasks = Column(Integer, default=0)                        # progress: jumlah request (sumber x tanggal)
+    completed_tasks = Column(Integer, default=0)
+    error_reason = Column(Text)                                     # null kecuali status FAILED
+    heartbeat_at = Column(DateTime)                                 # lease: diperbarui tiap commit progress
+    completed_at = Column(DateTime)                                 # waktu terakhir status jadi COMPLETED
+    citilink_requested = Column(Boolean, default=False)             # job dikirim dengan token Citilink
 
     # Relationship
     fares = relationship("FlightFare", back_populates="run")
@@ -28,6 +37,8 @@ class ScrapeRun(Base):
     __table_args__ = (
         Index("idx_scrape_runs_run_id", "run_id"),
         Index("idx_scrape_runs_scrape_date", "scrape_date"),
+        Index("idx_scrape_runs_status", "status"),
+        Index("idx_scrape_runs_route_status", "route", "status", "id"),  # run terakhir / in-flight per rute
     )
 
 
@@ -39,6 +50,7 @@ class FlightFare(Base):
 
     # FK ke scrape_runs
     run_id = Column(String(50), ForeignKey("scrape_runs.run_id"), nullable=False)
+    scrape_date = Column(Date, nullable=False)                 # = ScrapeRun.scrape_date (partition key)
 
     # --- Data Primer ---
     route = Column(String(10), nullable=False)                # "BTH-CGK"
@@ -65,7 +77,17 @@ class FlightFare(Base):
     __table_args__ = (
         Index("idx_flight_fares_route_date", "route", "travel_date"),
         Index("idx_flight_fares_run_id", "run_id"),
-        Index("idx_flight_fares_airline", "airline"),
+        # /history: urutan keyset, hanya baris SUCCESS
+        Index("idx_flight_fares_history", "route", "travel_date", "basic_fare", "id",
+              postgresql_where=text("status_scrape = 'SUCCESS'"),
+              sqlite_where=text("status_scrape = 'SUCCESS'")),
+        # summary & fare_triangle per run: index-only scan baris SUCCESS
+        Index("idx_flight_fares_run_success", "run_id",
+              postgresql_include=["route", "airline", "travel_date", "basic_fare"],
+              postgresql_where=text("status_scrape = 'SUCCESS'"),
+              sqlite_where=text("status_scrape = 'SUCCESS'")),
+        # PostgreSQL: partisi bulanan per scrape_date (lihat partition_service)
+        {"postgresql_partition_by": "RANGE (scrape_date)", "info": {"partition_key": "scrape_date"}},
     )
 
 
@@ -90,4 +112,87 @@ class FareDailySummary(Base):
     __table_args__ = (
         Index("idx_fare_summary_route_date", "route", "travel_date"),
         Index("idx_fare_summary_scrape_date", "scrape_date"),
+        # Lookup DoD: summary scrape_date sebelumnya per (route, airline, travel_date)
+        Index("idx_fare_summary_dod", "route", "airline", "travel_date", "scrape_date"),
+        {"postgresql_partition_by": "RANGE (scrape_date)", "info": {"partition_key": "scrape_date"}},
     )
+
+
+class RawResponse(Base):
+    """Index arsip raw JSON per (run, sumber, tanggal); isi file di ARCHIVE_DIR."""
+    __tablename__ = "raw_responses"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    run_id = Column(String(50), ForeignKey("scrape_runs.run_id"), nullable=False)
+    source = Column(String(30), nullable=False)                # garuda_api / citilink_api / bookcabin_api
+    travel_date = Column(Date, nullable=False)
+    content_hash = Column(String(64), nullable=False)          # sha256 dari JSON kanonik
+    codec = Column(String(4), nullable=False)                  # zst / gz
+    size_bytes = Column(Integer)                               # ukuran terkompresi
+    archived_at = Column(DateTime, server_default=func.now())
+
+    __table_args__ = (
+        Index("idx_raw_responses_run", "run_id", "source", "travel_date"),
+        Index("idx_raw_responses_hash", "content_hash"),
+    )
+
+
+class FareTriangle(Base):
+    """Data Turunan — harga termurah per cell segitiga export (materialized)."""
+    __tablename__ = "fare_triangle"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    route = Column(String(10), nullable=False)
+    airline = Column(String(50), nullable=False)
+    scrape_date = Column(Date, nullable=False)                 # baris segitiga
+    travel_date = Column(Date, nullable=False)                 # kolom segitiga
+    min_fare = Column(Numeric(15, 2), nullable=False)
+
+    __table_args__ = (
+        Index("uq_fare_triangle_cell", "route", "airline", "scrape_date", "travel_date", unique=True),
+    )
+
+
+# =============================================
+# Tabel partisi (PostgreSQL)
+# =============================================
+# Primary key tabel partisi wajib memuat partition key. Di model, PK tetap `id`
+# saja (unik lewat sequence, dan SQLite tetap memakai INTEGER PRIMARY KEY
+# autoincrement); hanya DDL PostgreSQL yang menambahkan scrape_date.
+
+@compiles(PrimaryKeyConstraint, "postgresql")
+def _partitioned_primary_key(constraint, compiler, **kw):
+    ddl = compiler.visit_primary_key_constraint(constraint, **kw)
+    partition_key = constraint.table.info.get("partition_key")
+    if partition_key and partition_key not in constraint.columns:
+        ddl = ddl.rstrip()[:-1] + f", {partition_key})"
+    return ddl
+
+
+# Partisi DEFAULT dibuat bersama tabel, supaya insert tidak pernah gagal
+# walau partisi bulanan belum dibuat partition_service
+for _table in (FlightFare.__table__, FareDailySummary.__table__):
+    event.listen(_table, "after_create", DDL(
+        "CREATE TABLE IF NOT EXISTS %(table)s_default PARTITION OF %(table)s DEFAULT"
+    ).execute_if(dialect="postgresql"))
+
+
+# =============================================
+# Index trigram untuk /history airline ILIKE '%x%'
+# =============================================
+# Butuh extension pg_trgm (paket contrib, trusted sejak PostgreSQL 13); dibuat
+# hanya jika tersedia di server, supaya instalasi tanpa contrib tetap jalan.
+
+def _pg_trgm_available(ddl, target, bind, **kw) -> bool:
+    if bind.dialect.name != "postgresql":
+        return False
+    return bind.execute(text(
+        "SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'"
+    )).first() is not None
+
+
+for _ddl in (
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS idx_flight_fares_airline_trgm ON flight_fares USING gin (airline gin_trgm_ops)",
+):
+    event.listen(FlightFare.__table__, "after_create", DDL(_ddl).execute_if(callable_=_pg_trgm_available))
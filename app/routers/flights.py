@@ -2,22 +2,34 @@
 flights.py — API endpoints untuk flight scraping.
 """
 
+import os
 from datetime import date
 from typing import Optional
 
-from fastapi import APIRouter, Depends, Query
-from fastapi.responses import FileResponse
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import FileResponse, StreamingResponse
+from pydantic import TypeAdapter
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from starlette.background import BackgroundTask
 
-from app.database import get_db
+from app.database import get_db, get_read_db, get_async_db, get_async_read_db
 from app.models.flight import FlightFare, ScrapeRun, FareDailySummary
 from app.schemas.flight import (
     FlightFareOut, ScrapeRunOut, FareDailySummaryOut,
     ScrapeRequest, ScrapeResponse, ExportRequest,
-    BulkRoutesRequest, BulkRoutesResponse, RouteItem,
+    BulkRoutesRequest, BulkRoutesResponse, JobSubmitResponse,
 )
-from app.services.scraper_service import scrape_and_save
+from app.services.scraper_service import scrape_and_save, scrape_routes, reparse_run, resume_run
 from app.services.export_service import export_triangle_xlsx
+from app.services.query_service import (
+    history_query, summary_query, runs_query, stream_rows, STREAM_MEDIA_TYPES,
+    HISTORY_KEY, RUNS_KEY, encode_cursor, decode_cursor,
+)
+from app.services import columnar_service
+from app.services.result_cache_service import CachedResult, result_cache, make_etag, etag_matches
+from app.services.job_service import submit_job, resume_job
 from app.config import settings
 
 router = APIRouter(prefix="/api/flights", tags=["Flights"])
@@ -50,46 +62,78 @@ def bulk_scrape(req: ScrapeRequest, db: Session = Depends(get_db)):
 
 
 @router.post("/bulk-routes", response_model=BulkRoutesResponse)
-def bulk_routes_scrape(req: BulkRoutesRequest, db: Session = Depends(get_db)):
-    """Scrape beberapa rute sekaligus.
+def bulk_routes_scrape(req: BulkRoutesRequest):
+    """Scrape beberapa rute sekaligus (paralel, 1 run_id per rute).
     
     Jika `routes` kosong, pakai DEFAULT_ROUTES dari config:
     BTH-CGK, BTH-KNO, BTH-SUB, BTH-PDG, TNJ-CGK
     """
     # Pakai default routes jika tidak ada
-    routes = req.routes
-    if not routes:
-        routes = [RouteItem(**r) for r in settings.DEFAULT_ROUTES]
-
-    results: list[ScrapeResponse] = []
-    total_records = 0
-
-    for route in routes:
-        result = scrape_and_save(
-            db=db,
-            origin=route.origin,
-            destination=route.destination,
-            start_date=req.start_date,
-            end_date=req.end_date,
-            citilink_token=req.citilink_token,
-            run_type=req.run_type,
-        )
-        results.append(ScrapeResponse(**result))
-        total_records += result["total_records"]
+    routes = [r.model_dump() for r in req.routes] if req.routes else settings.DEFAULT_ROUTES
+
+    results = scrape_routes(
+        routes=routes,
+        start_date=req.start_date,
+        end_date=req.end_date,
+        citilink_token=req.citilink_token,
+        run_type=req.run_type,
+    )
 
     return BulkRoutesResponse(
         total_routes=len(routes),
-        total_records=total_records,
-        results=results,
+        total_records=sum(r["total_records"] for r in results),
+        results=[ScrapeResponse(**r) for r in results],
     )
 
 
+# =============================================
+# Jobs — scraping di background
+# =============================================
+
+@router.post("/jobs", response_model=JobSubmitResponse, status_code=202)
+def submit_scrape_job(req: ScrapeRequest, db: Session = Depends(get_db)):
+    """Sama seperti /bulk, tapi langsung return run_id. Poll progress via /runs/{run_id}."""
+    run = submit_job(db=db, origin=req.origin, destination=req.destination,
+                     start_date=req.start_date, end_date=req.end_date,
+                     citilink_token=req.citilink_token, run_type=req.run_type)
+    return JobSubmitResponse(status="QUEUED", run_ids=[run.run_id])
+
+
+@router.post("/jobs/bulk-routes", response_model=JobSubmitResponse, status_code=202)
+def submit_bulk_routes_job(req: BulkRoutesRequest, db: Session = Depends(get_db)):
+    """Sama seperti /bulk-routes, tapi 1 job per rute di background."""
+    routes = [r.model_dump() for r in req.routes] if req.routes else settings.DEFAULT_ROUTES
+    run_ids = [
+        submit_job(db=db, origin=route["origin"], destination=route["destination"],
+                   start_date=req.start_date, end_date=req.end_date,
+                   citilink_token=req.citilink_token, run_type=req.run_type).run_id
+        for route in routes
+    ]
+    return JobSubmitResponse(status="QUEUED", run_ids=run_ids)
+
+
+@router.post("/jobs/{run_id}/resume", response_model=JobSubmitResponse, status_code=202)
+def submit_resume_job(
+    run_id: str,
+    citilink_token: Optional[str] = Query(default=None),
+    db: Session = Depends(get_db),
+):
+    """Sama seperti /runs/{run_id}/resume, tapi di background."""
+    try:
+        run = resume_job(db, run_id, citilink_token=citilink_token)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    if run is None:
+        raise HTTPException(status_code=404, detail="Run tidak ditemukan.")
+    return JobSubmitResponse(status="QUEUED", run_ids=[run.run_id])
+
+
 # =============================================
 # Export
 # =============================================
 
 @router.post("/export")
-def export_xlsx(req: ExportRequest, db: Session = Depends(get_db)):
+def export_xlsx(req: ExportRequest, db: Session = Depends(get_read_db)):
     """Export data dari DB ke XLSX format segitiga."""
     filepath = export_triangle_xlsx(db=db, origin=req.origin, destination=req.destination,
                                      start_date=req.start_date, end_date=req.end_date,
@@ -101,34 +145,134 @@ def export_xlsx(req: ExportRequest, db: Session = Depends(get_db)):
                         filename=filepath.split("\\")[-1].split("/")[-1])
 
 
+@router.get("/export/columnar")
+def export_columnar(
+    table: str = Query(default="fares", pattern="^(fares|summary)$"),
+    format: str = Query(default="parquet", pattern="^(parquet|arrow)$"),
+    route: Optional[str] = Query(default=None),
+    airline: Optional[str] = Query(default=None),
+    travel_date_from: Optional[date] = Query(default=None),
+    travel_date_to: Optional[date] = Query(default=None),
+    run_id: Optional[str] = Query(default=None, description="Hanya untuk table=fares"),
+    scrape_date: Optional[date] = Query(default=None, description="Hanya untuk table=summary"),
+    scrape_date_from: Optional[date] = Query(default=None, description="Filter scrape_date (partition pruning)"),
+    scrape_date_to: Optional[date] = Query(default=None),
+    db: Session = Depends(get_read_db),
+):
+    """Export flight_fares / fare_daily_summary ke Parquet atau Arrow IPC stream (filter sama dengan /history & /summary)."""
+    if not columnar_service.is_available():
+        raise HTTPException(status_code=501, detail="Export kolumnar butuh paket `pyarrow`.")
+
+    columns = columnar_service.table_columns(table)
+    filters = dict(route=route, airline=airline, travel_date_from=travel_date_from,
+                   travel_date_to=travel_date_to, scrape_date_from=scrape_date_from,
+                   scrape_date_to=scrape_date_to, columns=columns)
+    if table == "fares":
+        query = history_query(run_id=run_id, **filters)
+    else:
+        query = summary_query(scrape_date=scrape_date, **filters)
+
+    filepath = columnar_service.export_columnar(db, query, columns, format)
+    suffix, media_type = columnar_service.FORMATS[format]
+    name = f"aero_{table}_{route}{suffix}" if route else f"aero_{table}{suffix}"
+    return FileResponse(path=filepath, media_type=media_type, filename=name,
+                        background=BackgroundTask(os.remove, filepath))
+
+
 # =============================================
 # History — Flight Fares (Data Primer)
 # =============================================
 
+def _parse_cursor(cursor: str | None, key: tuple) -> list | None:
+    if not cursor:
+        return None
+    try:
+        return decode_cursor(cursor, key)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def _next_cursor(rows: list, limit: int, key: tuple) -> dict[str, str]:
+    """Header X-Next-Cursor hanya jika halaman penuh (mungkin masih ada baris berikutnya)."""
+    if rows and len(rows) == limit:
+        return {"X-Next-Cursor": encode_cursor(rows[-1], key)}
+    return {}
+
+
+_FARES_ADAPTER = TypeAdapter(list[FlightFareOut])
+_SUMMARY_ADAPTER = TypeAdapter(list[FareDailySummaryOut])
+
+
+def _cache_rows(key: tuple, adapter: TypeAdapter, rows: list, headers: dict | None = None) -> CachedResult:
+    """Serialize baris ORM ke JSON sekali, simpan di result_cache."""
+    body = adapter.dump_json(adapter.validate_python(rows, from_attributes=True))
+    result = CachedResult(body=body, etag=make_etag(body), headers=headers or {})
+    result_cache.set(key, result)
+    return result
+
+
+def _cached_response(request: Request, result: CachedResult) -> Response:
+    """Body JSON + ETag; 304 tanpa body jika If-None-Match cocok."""
+    headers = {"ETag": result.etag, "Cache-Control": "no-cache", **result.headers}
+    if etag_matches(request.headers.get("if-none-match"), result.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=result.body, media_type="application/json", headers=headers)
+
+
 @router.get("/history", response_model=list[FlightFareOut])
-def get_history(
+async def get_history(
+    request: Request,
     route: Optional[str] = Query(default=None),
     airline: Optional[str] = Query(default=None),
     travel_date_from: Optional[date] = Query(default=None),
     travel_date_to: Optional[date] = Query(default=None),
     run_id: Optional[str] = Query(default=None),
+    scrape_date_from: Optional[date] = Query(default=None, description="Filter scrape_date (partition pruning)"),
+    scrape_date_to: Optional[date] = Query(default=None),
     limit: int = Query(default=100, le=1000),
     offset: int = Query(default=0, ge=0),
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = Query(default=None, description="X-Next-Cursor dari halaman sebelumnya (offset diabaikan)"),
+    format: str = Query(default="json", pattern="^(json|ndjson|csv)$",
+                        description="ndjson/csv = streaming semua baris (limit/offset diabaikan)"),
+    db: AsyncSession = Depends(get_async_read_db),
 ):
-    """Query riwayat harga penerbangan dari database."""
-    query = db.query(FlightFare).filter(FlightFare.status_scrape == "SUCCESS")
-    if route:
-        query = query.filter(FlightFare.route == route)
-    if airline:
-        query = query.filter(FlightFare.airline.ilike(f"%{airline}%"))
-    if travel_date_from:
-        query = query.filter(FlightFare.travel_date >= travel_date_from)
-    if travel_date_to:
-        query = query.filter(FlightFare.travel_date <= travel_date_to)
-    if run_id:
-        query = query.filter(FlightFare.run_id == run_id)
-    return query.order_by(FlightFare.travel_date, FlightFare.basic_fare).offset(offset).limit(limit).all()
+    """
+    Query riwayat harga penerbangan dari database.
+
+    Untuk paging dalam, pakai `cursor`: nilai header `X-Next-Cursor` halaman
+    sebelumnya (keyset pada travel_date, basic_fare, id; tidak melambat
+    seiring kedalaman halaman seperti `offset`).
+
+    Hasil JSON di-cache (RESULT_CACHE_TTL) sampai ada run rute ini yang
+    selesai; kirim `If-None-Match` dengan ETag sebelumnya untuk dapat 304.
+    """
+    if format != "json":
+        columns = list(FlightFare.__table__.columns)
+        return StreamingResponse(
+            stream_rows(history_query(route=route, airline=airline, travel_date_from=travel_date_from,
+                                      travel_date_to=travel_date_to, run_id=run_id,
+                                      scrape_date_from=scrape_date_from,
+                                      scrape_date_to=scrape_date_to, columns=columns),
+                        columns, format),
+            media_type=STREAM_MEDIA_TYPES[format],
+        )
+
+    after = _parse_cursor(cursor, HISTORY_KEY)
+    key = result_cache.key("history", route, dict(
+        airline=airline, travel_date_from=travel_date_from, travel_date_to=travel_date_to,
+        run_id=run_id, scrape_date_from=scrape_date_from, scrape_date_to=scrape_date_to,
+        limit=limit, offset=None if after else offset, cursor=cursor,
+    ))
+    cached = result_cache.get(key)
+    if cached is None:
+        query = history_query(route=route, airline=airline, travel_date_from=travel_date_from,
+                              travel_date_to=travel_date_to, run_id=run_id,
+                              scrape_date_from=scrape_date_from, scrape_date_to=scrape_date_to, after=after)
+        if after is None:
+            query = query.offset(offset)
+        rows = (await db.scalars(query.limit(limit))).all()
+        cached = _cache_rows(key, _FARES_ADAPTER, rows, _next_cursor(rows, limit, HISTORY_KEY))
+    return _cached_response(request, cached)
 
 
 # =============================================
@@ -136,25 +280,53 @@ def get_history(
 # =============================================
 
 @router.get("/runs", response_model=list[ScrapeRunOut])
-def get_runs(
+async def get_runs(
+    response: Response,
     route: Optional[str] = Query(default=None),
     status: Optional[str] = Query(default=None),
     limit: int = Query(default=20, le=100),
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = Query(default=None, description="X-Next-Cursor dari halaman sebelumnya"),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    """List semua scrape runs."""
-    query = db.query(ScrapeRun)
-    if route:
-        query = query.filter(ScrapeRun.route == route)
-    if status:
-        query = query.filter(ScrapeRun.status == status)
-    return query.order_by(ScrapeRun.scraped_at.desc()).limit(limit).all()
+    """List semua scrape runs (terbaru dulu)."""
+    before = _parse_cursor(cursor, RUNS_KEY)
+    rows = (await db.scalars(runs_query(route=route, status=status, before=before).limit(limit))).all()
+    response.headers.update(_next_cursor(rows, limit, RUNS_KEY))
+    return rows
 
 
 @router.get("/runs/{run_id}", response_model=ScrapeRunOut)
-def get_run_detail(run_id: str, db: Session = Depends(get_db)):
+async def get_run_detail(run_id: str, db: AsyncSession = Depends(get_async_db)):
     """Detail 1 scrape run."""
-    return db.query(ScrapeRun).filter(ScrapeRun.run_id == run_id).first()
+    return await db.scalar(select(ScrapeRun).where(ScrapeRun.run_id == run_id))
+
+
+@router.post("/runs/{run_id}/resume", response_model=ScrapeResponse)
+def resume_scrape_run(
+    run_id: str,
+    citilink_token: Optional[str] = Query(default=None),
+    db: Session = Depends(get_db),
+):
+    """Lanjutkan run yang gagal: hanya (sumber, tanggal) yang belum sukses yang di-scrape ulang."""
+    try:
+        result = resume_run(db, run_id, citilink_token=citilink_token)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    if result is None:
+        raise HTTPException(status_code=404, detail="Run tidak ditemukan.")
+    return result
+
+
+@router.post("/runs/{run_id}/reparse", response_model=ScrapeResponse)
+def reparse_scrape_run(run_id: str, db: Session = Depends(get_db)):
+    """Parse ulang 1 run dari arsip raw response (tanpa scraping ulang)."""
+    try:
+        result = reparse_run(db, run_id)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    if result is None:
+        raise HTTPException(status_code=404, detail="Run tidak ditemukan.")
+    return result
 
 
 # =============================================
@@ -162,25 +334,42 @@ def get_run_detail(run_id: str, db: Session = Depends(get_db)):
 # =============================================
 
 @router.get("/summary", response_model=list[FareDailySummaryOut])
-def get_daily_summary(
+async def get_daily_summary(
+    request: Request,
     route: Optional[str] = Query(default=None),
     airline: Optional[str] = Query(default=None),
     travel_date_from: Optional[date] = Query(default=None),
     travel_date_to: Optional[date] = Query(default=None),
     scrape_date: Optional[date] = Query(default=None),
+    scrape_date_from: Optional[date] = Query(default=None, description="Filter scrape_date (partition pruning)"),
+    scrape_date_to: Optional[date] = Query(default=None),
     limit: int = Query(default=100, le=1000),
-    db: Session = Depends(get_db),
+    format: str = Query(default="json", pattern="^(json|ndjson|csv)$",
+                        description="ndjson/csv = streaming semua baris (limit diabaikan)"),
+    db: AsyncSession = Depends(get_async_read_db),
 ):
-    """Query data turunan: min/avg/max/DoD/volatility per hari."""
-    query = db.query(FareDailySummary)
-    if route:
-        query = query.filter(FareDailySummary.route == route)
-    if airline:
-        query = query.filter(FareDailySummary.airline.ilike(f"%{airline}%"))
-    if travel_date_from:
-        query = query.filter(FareDailySummary.travel_date >= travel_date_from)
-    if travel_date_to:
-        query = query.filter(FareDailySummary.travel_date <= travel_date_to)
-    if scrape_date:
-        query = query.filter(FareDailySummary.scrape_date == scrape_date)
-    return query.order_by(FareDailySummary.travel_date, FareDailySummary.airline).limit(limit).all()
+    """Query data turunan: min/avg/max/DoD/volatility per hari (JSON di-cache + ETag, lihat /history)."""
+    if format != "json":
+        columns = list(FareDailySummary.__table__.columns)
+        return StreamingResponse(
+            stream_rows(summary_query(route=route, airline=airline, travel_date_from=travel_date_from,
+                                      travel_date_to=travel_date_to, scrape_date=scrape_date,
+                                      scrape_date_from=scrape_date_from,
+                                      scrape_date_to=scrape_date_to, columns=columns),
+                        columns, format),
+            media_type=STREAM_MEDIA_TYPES[format],
+        )
+
+    key = result_cache.key("summary", route, dict(
+        airline=airline, travel_date_from=travel_date_from, travel_date_to=travel_date_to,
+        scrape_date=scrape_date, scrape_date_from=scrape_date_from, scrape_date_to=scrape_date_to,
+        limit=limit,
+    ))
+    cached = result_cache.get(key)
+    if cached is None:
+        query = summary_query(route=route, airline=airline, travel_date_from=travel_date_from,
+                              travel_date_to=travel_date_to, scrape_date=scrape_date,
+                              scrape_date_from=scrape_date_from, scrape_date_to=scrape_date_to)
+        rows = (await db.scalars(query.limit(limit))).all()
+        cached = _cache_rows(key, _SUMMARY_ADAPTER, rows)
+    return _cached_response(request, cached)
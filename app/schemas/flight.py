@@ -17,8 +17,16 @@ class ScrapeRunOut(BaseModel):
     scrape_date: date
     route: str
     status: str
+    start_date: Optional[date] = None
+    end_date: Optional[date] = None
     total_records: int
     total_errors: int
+    total_tasks: int = 0
+    completed_tasks: int = 0
+    error_reason: Optional[str] = None
+    heartbeat_at: Optional[datetime] = None
+    completed_at: Optional[datetime] = None
+    citilink_requested: bool = False
 
     class Config:
         from_attributes = True
@@ -31,6 +39,7 @@ class ScrapeRunOut(BaseModel):
 class FlightFareOut(BaseModel):
     id: int
     run_id: str
+    scrape_date: Optional[date] = None
     route: str
     airline: str
     source: str
@@ -105,8 +114,9 @@ class BulkRoutesRequest(BaseModel):
 
 
 class ExportRequest(BaseModel):
-    origin: str = Field(default="BTH")
-    destination: str = Field(default="CGK")
+    # Dipakai sebagai nama folder cache export, jadi wajib kode IATA
+    origin: str = Field(default="BTH", pattern="^[A-Z]{3}$")
+    destination: str = Field(default="CGK", pattern="^[A-Z]{3}$")
     start_date: Optional[date] = None
     end_date: Optional[date] = None
     scrape_date: Optional[date] = Field(default=None)
@@ -139,3 +149,8 @@ class BulkRoutesResponse(BaseModel):
     total_records: int
     results: list[ScrapeResponse]
 
+
+class JobSubmitResponse(BaseModel):
+    """Response setelah job scrape masuk antrian; poll via /runs/{run_id}."""
+    status: str
+    run_ids: list[str]
@@ -10,7 +10,7 @@ TARGET_AIRLINES = {
 }
 
 
-def fetch_bookcabin(origin, destination, depart_date):
+def fetch_bookcabin(origin, destination, depart_date, session=None, timeout=None):
     """
     Fetch data penerbangan dari API BookCabin.
     
@@ -18,6 +18,8 @@ def fetch_bookcabin(origin, destination, depart_date):
         origin: kode bandara asal, misal "BTH"
         destination: kode bandara tujuan, misal "CGK"
         depart_date: tanggal berangkat, format "YYYY-MM-DD"
+        session: requests.Session dari ScraperClient (opsional, default requests biasa)
+        timeout: timeout request dalam detik (opsional)
     
     Returns:
         dict: response JSON dari API BookCabin
@@ -35,7 +37,8 @@ def fetch_bookcabin(origin, destination, depart_date):
         "currencyCode": "IDR",
     }
 
-    response = requests.get(URL_BOOKCABIN, params=params)
+    http = session or requests
+    response = http.get(URL_BOOKCABIN, params=params, timeout=timeout)
     response.raise_for_status()
     return response.json()
 
@@ -127,7 +130,7 @@ def parse_bookcabin(data):
     return flights
 
 
-def scrape_bookcabin(origin, destination, depart_date):
+def scrape_bookcabin(origin, destination, depart_date, session=None, timeout=None):
     """
     Fungsi utama: fetch + parse sekaligus.
     
@@ -135,9 +138,11 @@ def scrape_bookcabin(origin, destination, depart_date):
         origin: kode bandara asal
         destination: kode bandara tujuan
         depart_date: tanggal berangkat (YYYY-MM-DD)
+        session: requests.Session dari ScraperClient (opsional, default requests biasa)
+        timeout: timeout request dalam detik (opsional)
     
     Returns:
         list[dict]: daftar penerbangan dari BookCabin (Super Air Jet, Batik Air, Lion Air)
     """
-    data = fetch_bookcabin(origin, destination, depart_date)
+    data = fetch_bookcabin(origin, destination, depart_date, session=session, timeout=timeout)
     return parse_bookcabin(data)
@@ -0,0 +1,105 @@
+"""
+cache.py — Cache raw response scraper per (source, origin, destination, date).
+
+Tier 1: memory (TTL + LRU). Tier 2 (opsional): file JSON gzip di
+FETCH_CACHE_DIR, supaya cache tetap hangat lintas restart / proses worker.
+File kedaluwarsa dihapus saat dibaca, dan disapu berkala setiap
+PRUNE_EVERY kali tulis. Tier disk adalah I/O blocking: pemanggil async
+(ScraperClient.afetch) menjalankannya di thread pool.
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+
+from app.cache import TTLCache
+from app.config import settings
+
+
+PRUNE_EVERY = 256
+
+
+class ResponseCache:
+    """Cache 2 tier untuk raw JSON dari API maskapai."""
+
+    def __init__(self, ttl: float | None = None, maxsize: int | None = None, disk_dir: str | None = None):
+        self.ttl = settings.FETCH_CACHE_TTL if ttl is None else ttl
+        self.memory = TTLCache(
+            maxsize=settings.FETCH_CACHE_MAX_ENTRIES if maxsize is None else maxsize,
+            ttl=self.ttl,
+        )
+        self.disk_dir = settings.FETCH_CACHE_DIR if disk_dir is None else disk_dir
+        self._writes = 0
+        self._lock = threading.Lock()
+        if self.disk_dir:
+            os.makedirs(self.disk_dir, exist_ok=True)
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0
+
+    def _disk_path(self, key: tuple) -> str:
+        digest = hashlib.sha256("|".join(key).encode()).hexdigest()
+        return os.path.join(self.disk_dir, f"{digest}.json.gz")
+
+    def get(self, key: tuple, disk: bool = True) -> dict | None:
+        """Cari di memory, lalu di disk (kecuali `disk` False: tanpa I/O file)."""
+        if not self.enabled:
+            return None
+        data = self.memory.get(key)
+        if data is not None or not self.disk_dir or not disk:
+            return data
+
+        path = self._disk_path(key)
+        try:
+            age = time.time() - os.path.getmtime(path)
+            if age > self.ttl:
+                os.remove(path)
+                return None
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        # Naikkan ke memory dengan sisa TTL-nya
+        self.memory.set(key, data, ttl=self.ttl - age)
+        return data
+
+    def set(self, key: tuple, data: dict):
+        if not self.enabled:
+            return
+        self.memory.set(key, data)
+        if self.disk_dir:
+            path = self._disk_path(key)
+            tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            try:
+                with gzip.open(tmp, "wt", encoding="utf-8") as f:
+                    json.dump(data, f)
+                os.replace(tmp, path)
+            except OSError:
+                pass
+            with self._lock:
+                self._writes += 1
+                due = self._writes % PRUNE_EVERY == 0
+            if due:
+                self.prune()
+
+    def prune(self):
+        """Hapus file disk yang sudah lewat TTL."""
+        cutoff = time.time() - self.ttl
+        for name in os.listdir(self.disk_dir):
+            path = os.path.join(self.disk_dir, name)
+            try:
+                if name.endswith(".json.gz") and os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+            except OSError:
+                pass
+
+    def clear(self):
+        self.memory.clear()
+        if self.disk_dir:
+            for name in os.listdir(self.disk_dir):
+                if name.endswith(".json.gz"):
+                    os.remove(os.path.join(self.disk_dir, name))
@@ -3,7 +3,7 @@ import requests
 URL_CITILINK = "https://dotrezapi-akm.prod.citilink.co.id/qg/dotrez/api/nsk/v1/availability/search/ssr"
 
 
-def fetch_citilink(origin, destination, depart_date, token):
+def fetch_citilink(origin, destination, depart_date, token, session=None, timeout=None):
     """
     Fetch data penerbangan dari API Citilink (Navitaire dotREZ).
     
@@ -12,6 +12,8 @@ def fetch_citilink(origin, destination, depart_date, token):
         destination: kode bandara tujuan, misal "CGK"
         depart_date: tanggal berangkat, format "YYYY-MM-DD"
         token: JWT token dari browser session Citilink
+        session: requests.Session dari ScraperClient (opsional, default requests biasa)
+        timeout: timeout request dalam detik (opsional)
     
     Returns:
         dict: response JSON dari API Citilink
@@ -48,7 +50,8 @@ def fetch_citilink(origin, destination, depart_date, token):
         "taxesAndFees": 2
     }
 
-    response = requests.post(URL_CITILINK, json=payload, headers=headers)
+    http = session or requests
+    response = http.post(URL_CITILINK, json=payload, headers=headers, timeout=timeout)
     response.raise_for_status()
     return response.json()
 
@@ -126,7 +129,7 @@ def parse_citilink(data):
     return flights
 
 
-def scrape_citilink(origin, destination, depart_date, token):
+def scrape_citilink(origin, destination, depart_date, token, session=None, timeout=None):
     """
     Fungsi utama: fetch + parse sekaligus.
     
@@ -135,9 +138,11 @@ def scrape_citilink(origin, destination, depart_date, token):
         destination: kode bandara tujuan
         depart_date: tanggal berangkat (YYYY-MM-DD)
         token: JWT token dari browser session Citilink
+        session: requests.Session dari ScraperClient (opsional, default requests biasa)
+        timeout: timeout request dalam detik (opsional)
     
     Returns:
         list[dict]: daftar penerbangan Citilink
     """
-    data = fetch_citilink(origin, destination, depart_date, token)
+    data = fetch_citilink(origin, destination, depart_date, token, session=session, timeout=timeout)
     return parse_citilink(data)
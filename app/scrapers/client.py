@@ -0,0 +1,181 @@
+"""
+client.py — Shared HTTP client untuk semua scraper.
+
+Setiap sumber (garuda_api / citilink_api / bookcabin_api) punya 1
+`requests.Session` sendiri dengan connection pool keep-alive, sehingga
+request berikutnya ke host yang sama tidak perlu DNS + TCP + TLS handshake lagi.
+
+Client juga jadi interface bersama untuk semua scraper: `fetch` / `parse` /
+`scrape` per nama sumber, plus varian async (`afetch` / `ascrape`) untuk
+orchestrator asyncio di scraper_service. Sebelum setiap request, client
+mengambil token dari rate limiter sumber tersebut (lihat ratelimit.py).
+Response sukses disimpan di ResponseCache, sehingga fetch ulang untuk
+(source, origin, destination, date) yang sama dalam TTL tidak ke upstream.
+"""
+
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from app.config import settings
+from app.scrapers.garuda import fetch_garuda, parse_garuda
+from app.scrapers.citilink import fetch_citilink, parse_citilink
+from app.scrapers.bookcabin import fetch_bookcabin, parse_bookcabin
+from app.scrapers.cache import ResponseCache
+from app.scrapers.ratelimit import TokenBucket, parse_retry_after
+
+
+SOURCES = ("garuda_api", "citilink_api", "bookcabin_api")
+
+PARSERS = {
+    "garuda_api": parse_garuda,
+    "citilink_api": parse_citilink,
+    "bookcabin_api": parse_bookcabin,
+}
+
+# Status yang memicu adaptive backoff
+BACKOFF_STATUS = {429, 500, 502, 503, 504}
+
+
+def _build_limiter(source: str) -> TokenBucket:
+    """Rate limiter dari settings.RATE_LIMITS; fallback ke 1 request / SCRAPE_DELAY."""
+    conf = settings.RATE_LIMITS.get(source, {})
+    default_rate = 1 / settings.SCRAPE_DELAY if settings.SCRAPE_DELAY > 0 else 10.0
+    return TokenBucket(
+        rate=float(conf.get("rate", default_rate)),
+        burst=int(conf.get("burst", 1)),
+        max_backoff=settings.RATE_LIMIT_MAX_BACKOFF,
+    )
+
+
+class ScraperClient:
+    """Pemilik connection pool per sumber, dipakai ulang lintas `scrape_and_save`."""
+
+    def __init__(self, pool_size: int | None = None, timeout: float | None = None):
+        self.pool_size = pool_size or settings.HTTP_POOL_SIZE
+        self.timeout = timeout or settings.HTTP_TIMEOUT
+        self._sessions: dict[str, requests.Session] = {}
+        self._executor: ThreadPoolExecutor | None = None
+        self._lock = threading.Lock()
+        self.limiters: dict[str, TokenBucket] = {src: _build_limiter(src) for src in SOURCES}
+        self.cache = ResponseCache()
+
+    def _build_session(self) -> requests.Session:
+        session = requests.Session()
+        # urllib3 pool thread-safe: 1 session boleh dipakai banyak thread sekaligus
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size, pool_block=True)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        session.headers["Connection"] = "keep-alive"
+        return session
+
+    def session(self, source: str) -> requests.Session:
+        """Ambil (atau buat) session untuk 1 sumber."""
+        if source not in SOURCES:
+            raise ValueError(f"Unknown source: {source}")
+        with self._lock:
+            if source not in self._sessions:
+                self._sessions[source] = self._build_session()
+            return self._sessions[source]
+
+    def _request(self, source: str, origin: str, destination: str, depart_date: str,
+                 token: str | None = None) -> dict:
+        session = self.session(source)
+        limiter = self.limiters[source]
+        try:
+            if source == "garuda_api":
+                data = fetch_garuda(origin, destination, depart_date, session=session, timeout=self.timeout)
+            elif source == "citilink_api":
+                data = fetch_citilink(origin, destination, depart_date, token, session=session, timeout=self.timeout)
+            else:
+                data = fetch_bookcabin(origin, destination, depart_date, session=session, timeout=self.timeout)
+        except requests.HTTPError as e:
+            if e.response is not None and e.response.status_code in BACKOFF_STATUS:
+                limiter.backoff(parse_retry_after(e.response.headers.get("Retry-After")))
+            raise
+        limiter.recover()
+        return data
+
+    def fetch(self, source: str, origin: str, destination: str, depart_date: str,
+              token: str | None = None, refresh: bool = False) -> dict:
+        """
+        Fetch raw JSON dari 1 sumber untuk 1 tanggal (menunggu rate limiter).
+
+        Jika `refresh` False dan ada di cache, response cache dipakai tanpa request.
+        """
+        key = (source, origin, destination, depart_date)
+        if not refresh:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+        self.limiters[source].acquire()
+        data = self._request(source, origin, destination, depart_date, token)
+        self.cache.set(key, data)
+        return data
+
+    @staticmethod
+    def parse(source: str, data: dict) -> list[dict]:
+        """Parse raw JSON sesuai sumbernya."""
+        return PARSERS[source](data)
+
+    def scrape(self, source: str, origin: str, destination: str, depart_date: str,
+               token: str | None = None, refresh: bool = False) -> list[dict]:
+        """Fetch + parse sekaligus (blocking)."""
+        return self.parse(source, self.fetch(source, origin, destination, depart_date, token, refresh))
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        # requests blocking, jadi I/O dijalankan di thread pool milik client.
+        # Ukurannya = total koneksi semua pool, supaya tidak jadi bottleneck.
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.pool_size * len(SOURCES),
+                    thread_name_prefix="scraper",
+                )
+            return self._executor
+
+    async def afetch(self, source: str, origin: str, destination: str, depart_date: str,
+                     token: str | None = None, refresh: bool = False) -> dict:
+        """Varian async dari `fetch`; menunggu rate limiter tanpa memblok thread."""
+        key = (source, origin, destination, depart_date)
+        loop = asyncio.get_running_loop()
+        # Tier disk cache = I/O file (gzip), dijalankan di thread pool, bukan di event loop
+        on_disk = bool(self.cache.disk_dir)
+        if not refresh:
+            cached = self.cache.get(key, disk=False)
+            if cached is None and on_disk:
+                cached = await loop.run_in_executor(self._get_executor(), self.cache.get, key)
+            if cached is not None:
+                return cached
+        await self.limiters[source].acquire_async()
+        data = await loop.run_in_executor(
+            self._get_executor(), self._request, source, origin, destination, depart_date, token,
+        )
+        if on_disk:
+            await loop.run_in_executor(self._get_executor(), self.cache.set, key, data)
+        else:
+            self.cache.set(key, data)
+        return data
+
+    async def ascrape(self, source: str, origin: str, destination: str, depart_date: str,
+                      token: str | None = None, refresh: bool = False) -> list[dict]:
+        """Varian async dari `scrape`. Parsing murni CPU, jadi tetap sync."""
+        data = await self.afetch(source, origin, destination, depart_date, token, refresh)
+        return self.parse(source, data)
+
+    def close(self):
+        """Tutup semua session (dipanggil di FastAPI lifespan)."""
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+
+# Instance global, ditutup di app.main lifespan
+scraper_client = ScraperClient()
@@ -7,7 +7,7 @@ URL_GARUDA = "https://web-api.garuda-indonesia.com/ga/revamp/v1.0/dapi/airFare"
 TARGET_FARES = ["ECO COMFORT", "ECO AFFORDABLE", "ECO PROMO"]
 
 
-def fetch_garuda(origin, destination, depart_date):
+def fetch_garuda(origin, destination, depart_date, session=None, timeout=None):
     """
     Fetch data penerbangan dari API Garuda Indonesia.
     
@@ -15,6 +15,8 @@ def fetch_garuda(origin, destination, depart_date):
         origin: kode bandara asal, misal "BTH"
         destination: kode bandara tujuan, misal "CGK"
         depart_date: tanggal berangkat, format "YYYY-MM-DD"
+        session: requests.Session dari ScraperClient (opsional, default requests biasa)
+        timeout: timeout request dalam detik (opsional)
     
     Returns:
         dict: response JSON dari API Garuda
@@ -35,7 +37,8 @@ def fetch_garuda(origin, destination, depart_date):
         }
     }
 
-    response = requests.post(URL_GARUDA, json=payload)
+    http = session or requests
+    response = http.post(URL_GARUDA, json=payload, timeout=timeout)
     response.raise_for_status()
     return response.json()
 
@@ -145,7 +148,7 @@ def parse_garuda(data):
     return flights
 
 
-def scrape_garuda(origin, destination, depart_date):
+def scrape_garuda(origin, destination, depart_date, session=None, timeout=None):
     """
     Fungsi utama: fetch + parse sekaligus.
     
@@ -153,9 +156,11 @@ def scrape_garuda(origin, destination, depart_date):
         origin: kode bandara asal
         destination: kode bandara tujuan
         depart_date: tanggal berangkat (YYYY-MM-DD)
+        session: requests.Session dari ScraperClient (opsional, default requests biasa)
+        timeout: timeout request dalam detik (opsional)
     
     Returns:
         list[dict]: daftar penerbangan ekonomi
     """
-    data = fetch_garuda(origin, destination, depart_date)
+    data = fetch_garuda(origin, destination, depart_date, session=session, timeout=timeout)
     return parse_garuda(data)
@@ -0,0 +1,97 @@
+"""
+ratelimit.py — Token-bucket rate limiter per sumber scraper.
+
+Setiap sumber punya bucket sendiri (requests/second + burst). Kalau sumber
+membalas 429/5xx, rate efektif diturunkan (multiplicative decrease) dan
+bucket ditahan sampai `Retry-After`; setiap request sukses menaikkan rate
+kembali sedikit demi sedikit (additive increase) sampai batas konfigurasi.
+"""
+
+import asyncio
+import threading
+import time
+
+
+class TokenBucket:
+    """Token bucket thread-safe, bisa dipakai dari thread maupun asyncio."""
+
+    def __init__(self, rate: float, burst: int = 1, min_rate: float | None = None,
+                 max_backoff: float = 60.0):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.min_rate = min_rate or rate / 10
+        self.max_backoff = max_backoff
+        self._current_rate = rate
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._failures = 0
+        self._lock = threading.Lock()
+
+    @property
+    def current_rate(self) -> float:
+        return self._current_rate
+
+    def _refill(self, now: float):
+        elapsed = now - self._updated
+        self._updated = now
+        self._tokens = min(self.burst, self._tokens + elapsed * self._current_rate)
+
+    def reserve(self) -> float:
+        """
+        Ambil 1 token, return berapa detik caller harus menunggu sebelum request.
+
+        Selama bucket ditahan, token dihitung mulai dari `blocked_until`
+        (bukan sekarang), jadi caller yang menunggu block yang sama dapat
+        giliran berjarak 1/rate, tidak bangun serentak saat block selesai.
+        """
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._blocked_until)
+            self._refill(start)
+            self._tokens -= 1
+            wait = -self._tokens / self._current_rate if self._tokens < 0 else 0.0
+            return start - now + wait
+
+    def acquire(self):
+        """Blocking acquire (untuk pemanggil sync)."""
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self):
+        """Non-blocking acquire (untuk orchestrator asyncio)."""
+        wait = self.reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def backoff(self, retry_after: float | None = None):
+        """Sumber menolak (429/5xx): turunkan rate dan tahan bucket sementara."""
+        with self._lock:
+            self._failures += 1
+            self._current_rate = max(self.min_rate, self._current_rate / 2)
+            delay = retry_after if retry_after is not None else min(
+                self.max_backoff, (2 ** (self._failures - 1)) / self._current_rate,
+            )
+            self._blocked_until = max(self._blocked_until, time.monotonic() + delay)
+            # Saat block selesai hanya 1 request yang langsung jalan, sisanya
+            # menunggu token yang baru terisi setelah blocked_until
+            self._tokens = min(self._tokens, 1.0)
+            self._updated = max(self._updated, self._blocked_until)
+
+    def recover(self):
+        """Request sukses: naikkan rate kembali secara bertahap."""
+        with self._lock:
+            self._failures = 0
+            if self._current_rate < self.rate:
+                self._current_rate = min(self.rate, self._current_rate + self.rate / 10)
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """Header `Retry-After` dalam detik (format HTTP-date diabaikan)."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        return None
@@ -0,0 +1,102 @@
+"""
+archive_service.py — Arsip raw JSON response scraper (compressed, content-addressed).
+
+Setiap response disimpan sekali per isi: nama file = sha256 dari JSON kanonik,
+dikompres zstd (jika paket `zstandard` ter-install) atau gzip. Tabel
+raw_responses menjadi index (run_id, source, travel_date) -> hash, sehingga
+1 run bisa di-parse ulang tanpa network (lihat scraper_service.reparse_run).
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime
+
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.flight import RawResponse
+
+try:
+    import zstandard
+except ImportError:  # optional dependency
+    zstandard = None
+
+
+ARCHIVE_DIR = settings.ARCHIVE_DIR or os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "archive",
+)
+
+DEFAULT_CODEC = "zst" if zstandard else "gz"
+
+
+def _compress(payload: bytes, codec: str) -> bytes:
+    if codec == "zst":
+        return zstandard.ZstdCompressor(level=settings.ARCHIVE_ZSTD_LEVEL).compress(payload)
+    return gzip.compress(payload)
+
+
+def _decompress(blob: bytes, codec: str) -> bytes:
+    if codec == "zst":
+        if zstandard is None:
+            raise RuntimeError("Arsip .zst butuh paket `zstandard`")
+        return zstandard.ZstdDecompressor().decompressobj().decompress(blob)
+    return gzip.decompress(blob)
+
+
+def _blob_path(content_hash: str, codec: str) -> str:
+    return os.path.join(ARCHIVE_DIR, content_hash[:2], content_hash[2:4], f"{content_hash}.json.{codec}")
+
+
+def store_raw(data: dict) -> tuple[str, str, int]:
+    """
+    Simpan 1 raw response ke arsip (skip jika isi yang sama sudah ada).
+
+    Returns:
+        tuple (content_hash, codec, size_bytes)
+    """
+    payload = json.dumps(data, sort_keys=True, separators=(",", ":")).encode("utf-8")
+    content_hash = hashlib.sha256(payload).hexdigest()
+
+    # Dedup: cari blob dengan hash sama di codec apa pun
+    for codec in (DEFAULT_CODEC, "gz", "zst"):
+        path = _blob_path(content_hash, codec)
+        if os.path.exists(path):
+            return content_hash, codec, os.path.getsize(path)
+
+    codec = DEFAULT_CODEC
+    path = _blob_path(content_hash, codec)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    blob = _compress(payload, codec)
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(blob)
+    os.replace(tmp, path)
+    return content_hash, codec, len(blob)
+
+
+def load_raw(content_hash: str, codec: str) -> dict:
+    """Baca kembali raw response dari arsip."""
+    with open(_blob_path(content_hash, codec), "rb") as f:
+        return json.loads(_decompress(f.read(), codec))
+
+
+def archive_response(run_id: str, source: str, date_str: str, data: dict) -> dict:
+    """Simpan raw response, return baris index raw_responses (belum ditulis ke DB)."""
+    content_hash, codec, size = store_raw(data)
+    return {
+        "run_id": run_id,
+        "source": source,
+        "travel_date": datetime.strptime(date_str, "%Y-%m-%d").date(),
+        "content_hash": content_hash,
+        "codec": codec,
+        "size_bytes": size,
+    }
+
+
+def save_archive_index(db: Session, rows: list[dict]):
+    """Tulis baris index raw_responses (belum di-commit)."""
+    if rows:
+        db.execute(RawResponse.__table__.insert(), rows)
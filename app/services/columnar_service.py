@@ -0,0 +1,122 @@
+"""
+columnar_service.py — Export flight_fares / fare_daily_summary ke Parquet atau Arrow IPC.
+
+Baris dibaca lewat server-side cursor (yield_per) dan ditulis per row group
+berukuran COLUMNAR_BATCH_SIZE, jadi memori tetap terbatas berapa pun jumlah
+baris. Tipe kolom diturunkan dari model (Numeric -> decimal128, Date ->
+date32, dst.) supaya hasilnya langsung bisa dibaca pandas/polars/duckdb.
+
+Butuh paket opsional `pyarrow`.
+"""
+
+import os
+import tempfile
+
+from sqlalchemy import Boolean, Date, DateTime, Float, Integer, Numeric, Select
+from sqlalchemy.orm import Session
+
+from app.models.flight import FlightFare, FareDailySummary
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # optional dependency
+    pa = None
+    pq = None
+
+
+COLUMNAR_BATCH_SIZE = 50_000
+
+TABLES = {
+    "fares": FlightFare,
+    "summary": FareDailySummary,
+}
+
+FORMATS = {
+    "parquet": (".parquet", "application/vnd.apache.parquet"),
+    "arrow": (".arrows", "application/vnd.apache.arrow.stream"),
+}
+
+
+def is_available() -> bool:
+    return pa is not None
+
+
+def _arrow_type(column):
+    col_type = column.type
+    if isinstance(col_type, Boolean):
+        return pa.bool_()
+    if isinstance(col_type, Integer):
+        return pa.int64()
+    if isinstance(col_type, Float):
+        return pa.float64()
+    if isinstance(col_type, Numeric):
+        return pa.decimal128(col_type.precision or 38, col_type.scale or 0)
+    if isinstance(col_type, DateTime):
+        return pa.timestamp("us")
+    if isinstance(col_type, Date):
+        return pa.date32()
+    return pa.string()
+
+
+def table_columns(table: str) -> list:
+    """Kolom model yang diexport untuk `table` (urutan sesuai definisi tabel)."""
+    return list(TABLES[table].__table__.columns)
+
+
+def _schema(columns: list):
+    return pa.schema([pa.field(c.name, _arrow_type(c), nullable=c.nullable) for c in columns])
+
+
+def _batches(db: Session, query: Select, schema):
+    """RecordBatch per COLUMNAR_BATCH_SIZE baris dari server-side cursor."""
+    names = schema.names
+    buffers: list[list] = [[] for _ in names]
+    rows = db.execute(query.execution_options(yield_per=COLUMNAR_BATCH_SIZE))
+    for row in rows:
+        for buf, value in zip(buffers, row):
+            buf.append(value)
+        if len(buffers[0]) >= COLUMNAR_BATCH_SIZE:
+            yield pa.RecordBatch.from_arrays(
+                [pa.array(buf, type=field.type) for buf, field in zip(buffers, schema)], schema=schema,
+            )
+            buffers = [[] for _ in names]
+    if buffers[0]:
+        yield pa.RecordBatch.from_arrays(
+            [pa.array(buf, type=field.type) for buf, field in zip(buffers, schema)], schema=schema,
+        )
+
+
+def export_columnar(db: Session, query: Select, columns: list, fmt: str) -> str:
+    """
+    Tulis hasil `query` (select `columns`) ke file Parquet / Arrow IPC stream.
+
+    Args:
+        db: Session
+        query: query yang memilih tepat `columns`, sudah difilter dan diurutkan
+        columns: kolom model (lihat table_columns)
+        fmt: "parquet" atau "arrow"
+
+    Returns:
+        str: path file sementara (caller yang menghapus setelah dikirim).
+    """
+    if pa is None:
+        raise RuntimeError("Export kolumnar butuh paket `pyarrow`")
+
+    suffix, _ = FORMATS[fmt]
+    schema = _schema(columns)
+    fd, path = tempfile.mkstemp(prefix="aero_", suffix=suffix)
+    os.close(fd)
+    try:
+        if fmt == "parquet":
+            with pq.ParquetWriter(path, schema, compression="zstd") as writer:
+                for batch in _batches(db, query, schema):
+                    writer.write_batch(batch, row_group_size=COLUMNAR_BATCH_SIZE)
+        else:
+            with pa.OSFile(path, "wb") as sink, pa.ipc.new_stream(sink, schema) as writer:
+                for batch in _batches(db, query, schema):
+                    writer.write_batch(batch)
+    except Exception:
+        os.remove(path)
+        raise
+    return path
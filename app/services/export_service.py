@@ -1,26 +1,117 @@
 """
 export_service.py — Export data dari database ke XLSX format segitiga.
+
+Hasil export di-cache di `exports/<route>/<key>/`, dengan key = hash dari
+parameter export + versi data rute (completed_at terakhir). Selama belum ada
+run yang selesai, request dengan parameter sama langsung dilayani dari
+file yang sudah ada. Total ukuran cache dibatasi EXPORT_CACHE_MAX_BYTES
+(file yang paling lama tidak dipakai dihapus lebih dulu).
 """
 
+import hashlib
+import logging
 import os
+import shutil
+import threading
 from datetime import date
 
 from openpyxl import Workbook
-from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font, Alignment, PatternFill, Border, Side, NamedStyle
 from openpyxl.utils import get_column_letter
-from sqlalchemy.orm import Session
 from sqlalchemy import func
+from sqlalchemy.orm import Session
 
-from app.models.flight import FlightFare, ScrapeRun
+from app.config import settings
+from app.models.flight import FareTriangle, ScrapeRun
+
+logger = logging.getLogger(__name__)
 
 
 EXPORTS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "exports")
 
+# Ukuran batch server-side cursor saat membaca cell segitiga
+EXPORT_BATCH_SIZE = 5000
+
+
+_cache_lock = threading.Lock()
+
 
 def _ensure_exports_dir():
     os.makedirs(EXPORTS_DIR, exist_ok=True)
 
 
+# =============================================
+# Export cache
+# =============================================
+
+def _data_version(db: Session, route: str) -> str:
+    """
+    Versi data rute: max(id) + max(completed_at) run COMPLETED.
+
+    completed_at hanya bertambah, jadi versi berubah juga saat run lama selesai
+    belakangan (job paralel, resume); max(id) untuk run sebelum kolom ada.
+    """
+    max_id, last_completed = db.query(func.max(ScrapeRun.id), func.max(ScrapeRun.completed_at)).filter(
+        ScrapeRun.route == route,
+        ScrapeRun.status == "COMPLETED",
+    ).one()
+    if max_id is None:
+        return "none"
+    return f"{max_id}:{last_completed.isoformat() if last_completed else ''}"
+
+
+def _cache_key(route: str, version: str, *params) -> str:
+    raw = "|".join([route, version] + [p.isoformat() if p else "" for p in params])
+    return hashlib.sha256(raw.encode()).hexdigest()[:16]
+
+
+def _cached_file(cache_dir: str) -> str | None:
+    if not os.path.isdir(cache_dir):
+        return None
+    for name in os.listdir(cache_dir):
+        if name.endswith(".xlsx"):
+            path = os.path.join(cache_dir, name)
+            os.utime(path)          # tandai baru dipakai (untuk urutan eviction)
+            return path
+    return None
+
+
+def _evict_exports(max_bytes: int, keep: str):
+    """Hapus entry cache paling lama tidak dipakai sampai total <= max_bytes (kecuali `keep`)."""
+    entries = []
+    total = 0
+    with _cache_lock:
+        for route in os.listdir(EXPORTS_DIR):
+            route_dir = os.path.join(EXPORTS_DIR, route)
+            if not os.path.isdir(route_dir):
+                continue
+            for key in os.listdir(route_dir):
+                key_dir = os.path.join(route_dir, key)
+                try:
+                    files = [os.stat(os.path.join(key_dir, f)) for f in os.listdir(key_dir)]
+                except OSError:
+                    continue
+                size = sum(st.st_size for st in files)
+                mtime = max((st.st_mtime for st in files), default=0)
+                entries.append((mtime, size, key_dir))
+                total += size
+
+        for _, size, key_dir in sorted(entries):
+            if total <= max_bytes:
+                break
+            if key_dir == keep:
+                continue
+            shutil.rmtree(key_dir, ignore_errors=True)
+            total -= size
+
+
+def invalidate_export_cache(route: str):
+    """Hapus semua export ter-cache untuk 1 rute (mis. setelah reparse run)."""
+    with _cache_lock:
+        shutil.rmtree(os.path.join(EXPORTS_DIR, route), ignore_errors=True)
+
+
 def _sanitize_sheet_name(name: str) -> str:
     """Max 31 chars, no invalid characters."""
     for c in ['\\', '/', '?', '*', '[', ']', ':']:
@@ -28,6 +119,68 @@ def _sanitize_sheet_name(name: str) -> str:
     return name[:31]
 
 
+def _register_styles(wb: Workbook):
+    """Named style dipakai bersama semua cell (bukan objek style baru per cell)."""
+    border = Border(
+        left=Side(style="thin"), right=Side(style="thin"),
+        top=Side(style="thin"), bottom=Side(style="thin"),
+    )
+    wb.add_named_style(NamedStyle(
+        name="aero_header",
+        font=Font(bold=True, size=10, color="FFFFFF"),
+        fill=PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid"),
+        border=border,
+        alignment=Alignment(horizontal="center", vertical="center"),
+    ))
+    wb.add_named_style(NamedStyle(
+        name="aero_scrape_date",
+        font=Font(bold=True, size=10),
+        fill=PatternFill(start_color="D9E2F3", end_color="D9E2F3", fill_type="solid"),
+        border=border,
+    ))
+    wb.add_named_style(NamedStyle(
+        name="aero_price",
+        border=border,
+        alignment=Alignment(horizontal="right"),
+        number_format="#,##0",
+    ))
+    wb.add_named_style(NamedStyle(
+        name="aero_empty",
+        border=border,
+        alignment=Alignment(horizontal="right"),
+    ))
+
+
+def _cell(ws, value, style: str) -> WriteOnlyCell:
+    cell = WriteOnlyCell(ws, value=value)
+    cell.style = style
+    return cell
+
+
+def _create_sheet(wb: Workbook, route: str, airline: str, travel_dates: list[date]):
+    ws = wb.create_sheet(_sanitize_sheet_name(f"{route} {airline}"))
+    ws.column_dimensions["A"].width = 18
+    for col_idx in range(2, len(travel_dates) + 2):
+        ws.column_dimensions[get_column_letter(col_idx)].width = 14
+
+    ws.append(
+        [_cell(ws, "Scrape Date \\ Flight Date", "aero_header")]
+        + [_cell(ws, td.strftime("%Y-%m-%d"), "aero_header") for td in travel_dates]
+    )
+    return ws
+
+
+def _write_row(ws, scrape_dt: date, prices: dict[date, float], travel_dates: list[date]):
+    row = [_cell(ws, scrape_dt.strftime("%Y-%m-%d"), "aero_scrape_date")]
+    for td in travel_dates:
+        price = prices.get(td)
+        if price:
+            row.append(_cell(ws, price, "aero_price"))
+        else:
+            row.append(_cell(ws, "-", "aero_empty"))
+    ws.append(row)
+
+
 def export_triangle_xlsx(
     db: Session,
     origin: str,
@@ -42,107 +195,90 @@ def export_triangle_xlsx(
     Baris = scrape_date, Kolom = travel_date, Value = harga termurah.
     1 sheet per airline.
 
+    Harga termurah per cell dibaca dari tabel fare_triangle (di-refresh setiap
+    run selesai) lewat server-side cursor, lalu ditulis ke workbook write-only,
+    sehingga biaya export sebanding dengan ukuran output, bukan history.
+
+    Jika file untuk parameter dan versi data yang sama sudah ada di cache,
+    file itu langsung dikembalikan tanpa query cell.
+
     Returns:
         str: absolute path ke file XLSX yang dihasilkan.
     """
     _ensure_exports_dir()
     route = f"{origin}-{destination}"
 
-    # Query data — JOIN ScrapeRun untuk scrape_date
-    query = db.query(FlightFare, ScrapeRun.scrape_date).join(
-        ScrapeRun, FlightFare.run_id == ScrapeRun.run_id
-    ).filter(
-        FlightFare.route == route,
-        FlightFare.status_scrape == "SUCCESS",
+    version = _data_version(db, route)
+    cache_dir = os.path.join(
+        EXPORTS_DIR, route, _cache_key(route, version, start_date, end_date, scrape_date_filter),
     )
+    cached = _cached_file(cache_dir)
+    if cached:
+        return cached
 
-    if start_date:
-        query = query.filter(FlightFare.travel_date >= start_date)
-    if end_date:
-        query = query.filter(FlightFare.travel_date <= end_date)
-    if scrape_date_filter:
-        query = query.filter(ScrapeRun.scrape_date == scrape_date_filter)
-
-    rows = query.order_by(ScrapeRun.scrape_date, FlightFare.travel_date).all()
+    def _filtered(query):
+        query = query.filter(FareTriangle.route == route)
+        if start_date:
+            query = query.filter(FareTriangle.travel_date >= start_date)
+        if end_date:
+            query = query.filter(FareTriangle.travel_date <= end_date)
+        if scrape_date_filter:
+            query = query.filter(FareTriangle.scrape_date == scrape_date_filter)
+        return query
 
-    if not rows:
+    # Kolom header (semua travel_date) harus diketahui sebelum baris pertama ditulis
+    all_travel_dates = [
+        td for (td,) in _filtered(db.query(FareTriangle.travel_date)).distinct().order_by(FareTriangle.travel_date)
+    ]
+    if not all_travel_dates:
         return ""
 
-    # Group by airline -> scrape_date -> travel_date -> cheapest price
-    data: dict[str, dict[date, dict[date, float]]] = {}
-    all_travel_dates_set: set[date] = set()
-    for fare, scrape_dt in rows:
-        airline = fare.airline
-        if airline not in data:
-            data[airline] = {}
-        if scrape_dt not in data[airline]:
-            data[airline][scrape_dt] = {}
-        td = fare.travel_date
-        all_travel_dates_set.add(td)
-        price = float(fare.basic_fare)
-        if td not in data[airline][scrape_dt] or price < data[airline][scrape_dt][td]:
-            data[airline][scrape_dt][td] = price
-
-    all_travel_dates = sorted(all_travel_dates_set)
-
-    # Build XLSX
-    wb = Workbook()
-    if "Sheet" in wb.sheetnames:
-        del wb["Sheet"]
-
-    # Styles
-    header_fill = PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid")
-    header_font = Font(bold=True, size=10, color="FFFFFF")
-    date_fill = PatternFill(start_color="D9E2F3", end_color="D9E2F3", fill_type="solid")
-    border = Border(
-        left=Side(style="thin"), right=Side(style="thin"),
-        top=Side(style="thin"), bottom=Side(style="thin"),
-    )
+    # Cell segitiga sudah di-materialize di fare_triangle (lihat triangle_service)
+    rows = _filtered(
+        db.query(FareTriangle.airline, FareTriangle.scrape_date, FareTriangle.travel_date, FareTriangle.min_fare)
+    ).order_by(
+        FareTriangle.airline, FareTriangle.scrape_date, FareTriangle.travel_date,
+    ).execution_options(stream_results=True).yield_per(EXPORT_BATCH_SIZE)
+
+    # Build XLSX (write-only), 1 baris segitiga per (airline, scrape_date)
+    wb = Workbook(write_only=True)
+    _register_styles(wb)
+
+    ws = None
+    current_airline = None
+    current_scrape_dt = None
+    prices: dict[date, float] = {}
 
-    for airline in sorted(data.keys()):
-        sheet_name = _sanitize_sheet_name(f"{route} {airline}")
-        ws = wb.create_sheet(sheet_name)
-
-        # Header row
-        cell = ws.cell(row=1, column=1, value="Scrape Date \\ Flight Date")
-        cell.font = header_font
-        cell.fill = header_fill
-        cell.border = border
-        cell.alignment = Alignment(horizontal="center", vertical="center")
-        ws.column_dimensions["A"].width = 18
-
-        for col_idx, td in enumerate(all_travel_dates, start=2):
-            cell = ws.cell(row=1, column=col_idx, value=td.strftime("%Y-%m-%d"))
-            cell.font = header_font
-            cell.fill = header_fill
-            cell.border = border
-            cell.alignment = Alignment(horizontal="center")
-            ws.column_dimensions[get_column_letter(col_idx)].width = 14
-
-        # Data rows (per scrape_date)
-        for row_idx, sd in enumerate(sorted(data[airline].keys()), start=2):
-            cell = ws.cell(row=row_idx, column=1, value=sd.strftime("%Y-%m-%d"))
-            cell.font = Font(bold=True, size=10)
-            cell.fill = date_fill
-            cell.border = border
-
-            for col_idx, td in enumerate(all_travel_dates, start=2):
-                cell = ws.cell(row=row_idx, column=col_idx)
-                price = data[airline][sd].get(td)
-                if price:
-                    cell.value = price
-                    cell.number_format = '#,##0'
-                else:
-                    cell.value = "-"
-                cell.border = border
-                cell.alignment = Alignment(horizontal="right")
+    for airline, scrape_dt, td, min_fare in rows:
+        if airline != current_airline or scrape_dt != current_scrape_dt:
+            if current_scrape_dt is not None:
+                _write_row(ws, current_scrape_dt, prices, all_travel_dates)
+            if airline != current_airline:
+                ws = _create_sheet(wb, route, airline, all_travel_dates)
+                current_airline = airline
+            current_scrape_dt = scrape_dt
+            prices = {}
+
+        prices[td] = float(min_fare)
+
+    if current_scrape_dt is not None:
+        _write_row(ws, current_scrape_dt, prices, all_travel_dates)
 
     # Save
-    start_str = start_date.strftime("%Y-%m-%d") if start_date else (min(all_travel_dates).strftime("%Y-%m-%d") if all_travel_dates else "ALL")
-    end_str = end_date.strftime("%Y-%m-%d") if end_date else (max(all_travel_dates).strftime("%Y-%m-%d") if all_travel_dates else "ALL")
+    start_str = start_date.strftime("%Y-%m-%d") if start_date else min(all_travel_dates).strftime("%Y-%m-%d")
+    end_str = end_date.strftime("%Y-%m-%d") if end_date else max(all_travel_dates).strftime("%Y-%m-%d")
 
     filename = f"aero_{route}_{start_str}_{end_str}.xlsx"
-    filepath = os.path.join(EXPORTS_DIR, filename)
-    wb.save(filepath)
+    filepath = os.path.join(cache_dir, filename)
+    os.makedirs(cache_dir, exist_ok=True)
+    # Tulis ke file sementara lalu rename, supaya request paralel tidak membaca file setengah jadi
+    tmp_path = f"{filepath}.{threading.get_ident()}.tmp"
+    wb.save(tmp_path)
+    os.replace(tmp_path, filepath)
+
+    try:
+        _evict_exports(settings.EXPORT_CACHE_MAX_BYTES, keep=cache_dir)
+    except OSError:
+        logger.exception("Eviction cache export gagal")
 
     return filepath
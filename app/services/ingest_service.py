@@ -0,0 +1,85 @@
+"""
+ingest_service.py — Bulk insert flight_fares tanpa lewat ORM.
+
+PostgreSQL (psycopg2 / psycopg 3) memakai `COPY ... FROM STDIN`, backend lain memakai
+executemany `insert()` biasa. Keduanya menulis dict hasil normalizer langsung
+ke tabel, tanpa membuat objek FlightFare / identity map per baris.
+"""
+
+import csv
+import io
+from datetime import date
+
+from sqlalchemy.orm import Session
+
+from app.models.flight import FlightFare
+
+
+FARE_TABLE = FlightFare.__table__
+FARE_COLUMNS = [c.name for c in FARE_TABLE.columns if c.name != "id"]
+
+# Default kolom yang tidak selalu ada di dict normalizer / placeholder FAILED
+_FARE_DEFAULTS = {
+    "currency": "IDR",
+    "status_scrape": "SUCCESS",
+    "is_lowest_fare": False,
+}
+
+_COPY_NULL = "\\N"
+
+
+def _complete_row(record: dict, defaults: dict) -> dict:
+    return {col: record.get(col, defaults.get(col)) for col in FARE_COLUMNS}
+
+
+def _copy_value(value):
+    if value is None:
+        return _COPY_NULL
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    return value
+
+
+def _copy_fares(db: Session, rows: list[dict]):
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    for row in rows:
+        writer.writerow([_copy_value(row[col]) for col in FARE_COLUMNS])
+    buf.seek(0)
+
+    sql = (
+        f"COPY {FARE_TABLE.name} ({', '.join(FARE_COLUMNS)}) "
+        f"FROM STDIN WITH (FORMAT csv, NULL '{_COPY_NULL}')"
+    )
+    # Pakai koneksi DBAPI milik transaksi session, supaya ikut commit/rollback
+    dbapi_conn = db.connection().connection
+    with dbapi_conn.cursor() as cursor:
+        if hasattr(cursor, "copy_expert"):          # psycopg2
+            cursor.copy_expert(sql, buf)
+        else:                                       # psycopg 3
+            with cursor.copy(sql) as copy:
+                copy.write(buf.getvalue())
+
+
+def bulk_insert_fares(db: Session, records: list[dict], scrape_date: date | None = None) -> int:
+    """
+    Tulis banyak record flight_fares sekaligus (belum di-commit).
+
+    Args:
+        records: dict hasil normalizer / placeholder FAILED
+        scrape_date: scrape_date run (partition key) untuk record yang belum punya
+
+    Returns:
+        int: jumlah baris yang ditulis.
+    """
+    if not records:
+        return 0
+
+    defaults = {**_FARE_DEFAULTS, "scrape_date": scrape_date}
+    rows = [_complete_row(r, defaults) for r in records]
+    dialect = db.get_bind().dialect
+    if dialect.name == "postgresql" and dialect.driver in ("psycopg2", "psycopg"):
+        _copy_fares(db, rows)
+    else:
+        db.execute(FARE_TABLE.insert(), rows)
+    return len(rows)
@@ -0,0 +1,245 @@
+"""
+job_service.py — Antrian job scraping di background, memakai tabel scrape_runs.
+
+Submit membuat ScrapeRun berstatus QUEUED lalu langsung return run_id.
+Worker (thread di proses API, atau proses terpisah via `python -m app.worker`)
+mengambil run QUEUED dengan `SELECT ... FOR UPDATE SKIP LOCKED`, menandainya
+RUNNING, lalu menjalankan `execute_run`. Run 1 rute tidak pernah jalan
+bersamaan: run QUEUED rute yang masih punya run RUNNING menunggu giliran. Progress bisa di-poll lewat
+`/api/flights/runs/{run_id}`.
+
+Setiap commit progress memperbarui `heartbeat_at` (lease). Run RUNNING yang
+lease-nya lewat JOB_LEASE_TIMEOUT (proses worker mati / di-kill) ditandai
+FAILED oleh reap_stale_runs, supaya scheduler tidak melewati rutenya terus
+dan run bisa di-resume.
+"""
+
+import logging
+import threading
+import time
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import and_, exists, or_, text, update
+from sqlalchemy.orm import Session, aliased
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models.flight import ScrapeRun
+from app.services.scraper_service import check_resumable, create_run, execute_run
+
+logger = logging.getLogger(__name__)
+
+# Token Citilink per job hanya disimpan di memori (tidak ditulis ke DB); run
+# hanya mencatat citilink_requested. Worker di proses lain memakai
+# settings.CITILINK_TOKEN, atau menandai run FAILED jika tidak punya token.
+_job_tokens: dict[str, str] = {}
+_tokens_lock = threading.Lock()
+
+
+def submit_job(
+    db: Session,
+    origin: str,
+    destination: str,
+    start_date: date,
+    end_date: date,
+    citilink_token: str | None = None,
+    run_type: str = "MANUAL",
+) -> ScrapeRun:
+    """Masukkan 1 scrape run ke antrian (status QUEUED)."""
+    run = create_run(db, origin, destination, start_date, end_date, run_type=run_type, status="QUEUED",
+                     citilink_requested=bool(citilink_token))
+    if citilink_token:
+        with _tokens_lock:
+            _job_tokens[run.run_id] = citilink_token
+    job_worker.notify()
+    return run
+
+
+def resume_job(db: Session, run_id: str, citilink_token: str | None = None) -> ScrapeRun | None:
+    """
+    Masukkan ulang run FAILED / COMPLETED ke antrian; worker hanya mengambil
+    (sumber, tanggal) yang belum sukses (lihat scraper_service.resume_run).
+
+    Returns:
+        ScrapeRun, atau None jika run tidak ditemukan.
+
+    Raises:
+        ValueError: lihat scraper_service.check_resumable.
+    """
+    run = db.query(ScrapeRun).filter(ScrapeRun.run_id == run_id).first()
+    if run is None:
+        return None
+    check_resumable(db, run, citilink_token)
+    # Token disimpan sebelum QUEUED supaya worker yang langsung claim sudah melihatnya
+    if citilink_token:
+        with _tokens_lock:
+            _job_tokens[run.run_id] = citilink_token
+
+    # Update bersyarat supaya 2 request resume bersamaan tidak double-queue
+    queued = db.execute(
+        update(ScrapeRun)
+        .where(ScrapeRun.id == run.id, ScrapeRun.status.in_(("FAILED", "COMPLETED")))
+        .values(status="QUEUED", citilink_requested=bool(citilink_token))
+    ).rowcount
+    db.commit()
+    if not queued:
+        with _tokens_lock:
+            _job_tokens.pop(run.run_id, None)
+        db.refresh(run)
+        raise ValueError(f"Run {run_id} masih {run.status}")
+    job_worker.notify()
+    return run
+
+
+def _route_running():
+    """EXISTS run RUNNING lain untuk rute yang sama (dikorelasikan ke ScrapeRun)."""
+    busy = aliased(ScrapeRun)
+    return exists().where(busy.route == ScrapeRun.route, busy.status == "RUNNING")
+
+
+def claim_next_job(db: Session) -> ScrapeRun | None:
+    """
+    Ambil 1 run QUEUED paling lama dan tandai RUNNING (aman untuk banyak worker).
+
+    Run yang rutenya masih punya run RUNNING dilewati, jadi beberapa run 1 rute
+    (mis. range tanggal dari 1 tick scheduler) dijalankan berurutan.
+    """
+    candidate = db.query(ScrapeRun.id, ScrapeRun.route).filter(
+        ScrapeRun.status == "QUEUED",
+        ~_route_running(),
+    ).order_by(ScrapeRun.id).with_for_update(skip_locked=True, of=ScrapeRun).first()
+    if candidate is None:
+        db.rollback()
+        return None
+
+    if db.get_bind().dialect.name == "postgresql":
+        # Serialisasi claim per rute: 2 worker dengan run QUEUED berbeda di rute sama
+        db.execute(text("SELECT pg_advisory_xact_lock(hashtext(:key))"),
+                   {"key": f"scrape_route:{candidate.route}"})
+    # Update bersyarat: backend tanpa row lock (SQLite) tetap tidak double-claim
+    claimed = db.execute(
+        update(ScrapeRun)
+        .where(ScrapeRun.id == candidate.id, ScrapeRun.status == "QUEUED", ~_route_running())
+        .values(status="RUNNING", heartbeat_at=datetime.now())
+    ).rowcount
+    db.commit()
+    if not claimed:
+        return None
+    return db.query(ScrapeRun).filter(ScrapeRun.id == candidate.id).first()
+
+
+def reap_stale_runs(db: Session, timeout: float | None = None) -> list[str]:
+    """
+    Tandai FAILED run RUNNING yang heartbeat-nya lebih tua dari `timeout` detik.
+
+    Run tanpa heartbeat (dibuat sebelum kolom ada) memakai scraped_at.
+
+    Returns:
+        list run_id yang ditandai FAILED.
+    """
+    timeout = settings.JOB_LEASE_TIMEOUT if timeout is None else timeout
+    cutoff = datetime.now() - timedelta(seconds=timeout)
+    stale = (
+        ScrapeRun.status == "RUNNING",
+        or_(ScrapeRun.heartbeat_at < cutoff,
+            and_(ScrapeRun.heartbeat_at.is_(None), ScrapeRun.scraped_at < cutoff)),
+    )
+    run_ids = [run_id for (run_id,) in db.query(ScrapeRun.run_id).filter(*stale)]
+    if not run_ids:
+        db.rollback()
+        return []
+    # Kondisi diulang di UPDATE: run yang baru saja heartbeat tidak ikut
+    db.execute(
+        update(ScrapeRun)
+        .where(ScrapeRun.run_id.in_(run_ids), *stale)
+        .values(status="FAILED", error_reason=f"Lease habis: tidak ada progress > {timeout:g} detik")
+    )
+    db.commit()
+    logger.warning("Run yatim ditandai FAILED: %s", ", ".join(run_ids))
+    return run_ids
+
+
+def run_next_job() -> bool:
+    """Jalankan 1 job dari antrian. Return False jika antrian kosong."""
+    db = SessionLocal()
+    try:
+        run = claim_next_job(db)
+        if run is None:
+            return False
+        with _tokens_lock:
+            token = _job_tokens.pop(run.run_id, None)
+        if run.citilink_requested and not (token or settings.CITILINK_TOKEN):
+            # Token ada di memori proses lain (atau hilang karena restart): jangan
+            # diam-diam scrape tanpa Citilink
+            run.status = "FAILED"
+            run.error_reason = ("Token Citilink job tidak tersedia di worker ini; "
+                                "resume dengan citilink_token atau set CITILINK_TOKEN")
+            db.commit()
+            logger.warning("Scrape job %s gagal: token Citilink tidak tersedia", run.run_id)
+            return True
+        try:
+            execute_run(db, run, citilink_token=token)
+        except Exception:
+            logger.exception("Scrape job %s gagal", run.run_id)
+        return True
+    finally:
+        db.close()
+
+
+class JobWorker:
+    """Pool thread yang terus mengambil job dari antrian scrape_runs."""
+
+    def __init__(self, workers: int | None = None, poll_interval: float | None = None):
+        self.workers = settings.JOB_WORKERS if workers is None else workers
+        self.poll_interval = poll_interval or settings.JOB_POLL_INTERVAL
+        self._threads: list[threading.Thread] = []
+        self._stop = threading.Event()
+        self._wake = threading.Condition()
+        self._reap_lock = threading.Lock()
+        self._next_reap = 0.0
+
+    def start(self):
+        self._stop.clear()
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._loop, name=f"scrape-job-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout: float | None = None):
+        self._stop.set()
+        self.notify(all_workers=True)
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads.clear()
+
+    def notify(self, all_workers: bool = False):
+        """Bangunkan worker yang sedang idle (dipanggil setelah submit)."""
+        with self._wake:
+            if all_workers:
+                self._wake.notify_all()
+            else:
+                self._wake.notify()
+
+    def _reap(self):
+        """reap_stale_runs maksimal 1x per JOB_POLL_INTERVAL x 30 untuk semua thread."""
+        with self._reap_lock:
+            if time.monotonic() < self._next_reap:
+                return
+            self._next_reap = time.monotonic() + self.poll_interval * 30
+        with SessionLocal() as db:
+            reap_stale_runs(db)
+
+    def _loop(self):
+        while not self._stop.is_set():
+            try:
+                self._reap()
+                if run_next_job():
+                    continue
+            except Exception:
+                logger.exception("Job worker error")
+            with self._wake:
+                self._wake.wait(self.poll_interval)
+
+
+# Instance global, di-start / stop di app.main lifespan
+job_worker = JobWorker()
@@ -0,0 +1,131 @@
+"""
+partition_service.py — Partisi bulanan flight_fares & fare_daily_summary (PostgreSQL).
+
+Kedua tabel di-partisi RANGE per scrape_date. Service ini:
+- membuat partisi bulan berjalan + PARTITION_MONTHS_AHEAD bulan ke depan
+  (ditambah partisi DEFAULT untuk scrape_date di luar range),
+- melepas (DETACH) partisi yang lebih tua dari PARTITION_RETENTION_MONTHS.
+  Partisi yang di-detach tetap ada sebagai tabel biasa untuk diarsip
+  (pg_dump) lalu di-DROP manual; tidak ada DELETE massal.
+
+Tidak dijalankan saat boot API (DDL butuh lock tabel): partisi ke depan dibuat
+oleh `python -m app.cli db upgrade`, dan `db maintain-partitions` dijadwalkan
+lewat cron (harian) untuk membuat partisi baru + detach partisi lama.
+
+Backend selain PostgreSQL (SQLite) tidak dipartisi, semua fungsi no-op.
+"""
+
+import logging
+import re
+from datetime import date
+
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import SessionLocal
+from app.migrations.runner import is_partitioned, partitions
+
+logger = logging.getLogger(__name__)
+
+PARTITIONED_TABLES = ("flight_fares", "fare_daily_summary")
+
+_PARTITION_RE = re.compile(r"_p(\d{4})(\d{2})$")
+
+
+def _month_start(d: date) -> date:
+    return d.replace(day=1)
+
+
+def _add_months(d: date, months: int) -> date:
+    index = d.year * 12 + (d.month - 1) + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(table: str, month: date) -> str:
+    """Nama partisi bulanan, e.g. flight_fares_p202610."""
+    return f"{table}_p{month:%Y%m}"
+
+
+def ensure_partitions(db: Session, months_ahead: int | None = None, today: date | None = None) -> list[str]:
+    """
+    Buat partisi DEFAULT + bulan berjalan s/d `months_ahead` bulan ke depan.
+
+    Returns:
+        list nama partisi yang baru dibuat.
+    """
+    if db.get_bind().dialect.name != "postgresql":
+        return []
+    months_ahead = settings.PARTITION_MONTHS_AHEAD if months_ahead is None else months_ahead
+    first = _month_start(today or date.today())
+
+    created = []
+    for table in PARTITIONED_TABLES:
+        if not is_partitioned(db, table):
+            logger.warning("Tabel %s belum dipartisi, lewati (jalankan migrasi)", table)
+            continue
+        existing = set(partitions(db, table))
+
+        if f"{table}_default" not in existing:
+            db.execute(text(f"CREATE TABLE {table}_default PARTITION OF {table} DEFAULT"))
+            created.append(f"{table}_default")
+
+        for i in range(months_ahead + 1):
+            month = _add_months(first, i)
+            name = partition_name(table, month)
+            if name in existing:
+                continue
+            try:
+                with db.begin_nested():
+                    db.execute(text(
+                        f"CREATE TABLE {name} PARTITION OF {table} "
+                        f"FOR VALUES FROM ('{month}') TO ('{_add_months(month, 1)}')"
+                    ))
+                created.append(name)
+            except DBAPIError:
+                # Biasanya: partisi DEFAULT sudah berisi baris bulan ini
+                logger.exception("Gagal membuat partisi %s", name)
+    db.commit()
+    if created:
+        logger.info("Partisi dibuat: %s", ", ".join(created))
+    return created
+
+
+def detach_old_partitions(db: Session, retention_months: int | None = None, today: date | None = None) -> list[str]:
+    """
+    DETACH partisi bulanan yang seluruhnya lebih tua dari `retention_months` bulan.
+
+    Returns:
+        list nama partisi yang di-detach (0 = retensi nonaktif).
+    """
+    if db.get_bind().dialect.name != "postgresql":
+        return []
+    retention_months = settings.PARTITION_RETENTION_MONTHS if retention_months is None else retention_months
+    if retention_months <= 0:
+        return []
+    cutoff = _add_months(_month_start(today or date.today()), -retention_months)
+
+    detached = []
+    for table in PARTITIONED_TABLES:
+        if not is_partitioned(db, table):
+            continue
+        for name in partitions(db, table):
+            match = _PARTITION_RE.search(name)
+            if not match or date(int(match[1]), int(match[2]), 1) >= cutoff:
+                continue
+            db.execute(text(f"ALTER TABLE {table} DETACH PARTITION {name}"))
+            detached.append(name)
+    db.commit()
+    if detached:
+        logger.info("Partisi di-detach (siap diarsip): %s", ", ".join(detached))
+    return detached
+
+
+def run_maintenance() -> tuple[list[str], list[str]]:
+    """Buat partisi ke depan + detach partisi lama. Return (created, detached)."""
+    db = SessionLocal()
+    try:
+        return ensure_partitions(db), detach_old_partitions(db)
+    finally:
+        db.close()
@@ -0,0 +1,207 @@
+"""
+query_service.py — Query builder bersama untuk data primer dan turunan.
+
+Dipakai endpoint JSON (/history, /summary), mode streaming NDJSON/CSV, dan
+export kolumnar, supaya filter yang sama menghasilkan baris yang sama di
+semua format.
+"""
+
+import base64
+import binascii
+import csv
+import io
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from typing import AsyncIterator
+
+from sqlalchemy import Select, select, tuple_
+
+from app.database import async_session
+from app.models.flight import FlightFare, FareDailySummary, ScrapeRun
+
+
+# Jumlah baris per chunk yang dikirim ke client (dan per fetch server-side cursor)
+STREAM_BATCH_SIZE = 1000
+
+# Kunci urutan unik untuk keyset pagination
+HISTORY_KEY = (FlightFare.travel_date, FlightFare.basic_fare, FlightFare.id)
+# scrape_runs: id dibuat saat insert (urutan sama dengan scraped_at) dan unik
+RUNS_KEY = (ScrapeRun.id,)
+
+
+def history_query(
+    route: str | None = None,
+    airline: str | None = None,
+    travel_date_from: date | None = None,
+    travel_date_to: date | None = None,
+    run_id: str | None = None,
+    scrape_date_from: date | None = None,
+    scrape_date_to: date | None = None,
+    columns: list | None = None,
+    after: list | None = None,
+) -> Select:
+    """
+    Query flight_fares SUCCESS sesuai filter /history.
+
+    Filter scrape_date (langsung, atau lewat run_id) membuat PostgreSQL hanya
+    membaca partisi bulan terkait. Urutan (travel_date, basic_fare, id) unik,
+    jadi bisa dipakai keyset pagination: `after` = kunci baris terakhir
+    halaman sebelumnya.
+
+    Returns:
+        Select 2.0, jalan di Session (`db.scalars`) maupun AsyncSession.
+    """
+    query = select(*columns) if columns else select(FlightFare)
+    query = query.filter(FlightFare.status_scrape == "SUCCESS")
+    if route:
+        query = query.filter(FlightFare.route == route)
+    if airline:
+        query = query.filter(FlightFare.airline.ilike(f"%{airline}%"))
+    if travel_date_from:
+        query = query.filter(FlightFare.travel_date >= travel_date_from)
+    if travel_date_to:
+        query = query.filter(FlightFare.travel_date <= travel_date_to)
+    if run_id:
+        run_scrape_date = select(ScrapeRun.scrape_date).where(ScrapeRun.run_id == run_id).scalar_subquery()
+        query = query.filter(FlightFare.scrape_date == run_scrape_date, FlightFare.run_id == run_id)
+    if scrape_date_from:
+        query = query.filter(FlightFare.scrape_date >= scrape_date_from)
+    if scrape_date_to:
+        query = query.filter(FlightFare.scrape_date <= scrape_date_to)
+    if after:
+        query = query.filter(tuple_(*HISTORY_KEY) > tuple_(*after))
+    return query.order_by(*HISTORY_KEY)
+
+
+def summary_query(
+    route: str | None = None,
+    airline: str | None = None,
+    travel_date_from: date | None = None,
+    travel_date_to: date | None = None,
+    scrape_date: date | None = None,
+    scrape_date_from: date | None = None,
+    scrape_date_to: date | None = None,
+    columns: list | None = None,
+) -> Select:
+    """Query fare_daily_summary sesuai filter /summary (urut travel_date, airline)."""
+    query = select(*columns) if columns else select(FareDailySummary)
+    if route:
+        query = query.filter(FareDailySummary.route == route)
+    if airline:
+        query = query.filter(FareDailySummary.airline.ilike(f"%{airline}%"))
+    if travel_date_from:
+        query = query.filter(FareDailySummary.travel_date >= travel_date_from)
+    if travel_date_to:
+        query = query.filter(FareDailySummary.travel_date <= travel_date_to)
+    if scrape_date:
+        query = query.filter(FareDailySummary.scrape_date == scrape_date)
+    if scrape_date_from:
+        query = query.filter(FareDailySummary.scrape_date >= scrape_date_from)
+    if scrape_date_to:
+        query = query.filter(FareDailySummary.scrape_date <= scrape_date_to)
+    return query.order_by(FareDailySummary.travel_date, FareDailySummary.airline)
+
+
+def runs_query(
+    route: str | None = None,
+    status: str | None = None,
+    before: list | None = None,
+) -> Select:
+    """Query scrape_runs terbaru dulu (id desc); `before` = kunci baris terakhir."""
+    query = select(ScrapeRun)
+    if route:
+        query = query.filter(ScrapeRun.route == route)
+    if status:
+        query = query.filter(ScrapeRun.status == status)
+    if before:
+        query = query.filter(tuple_(*RUNS_KEY) < tuple_(*before))
+    return query.order_by(*(col.desc() for col in RUNS_KEY))
+
+
+# =============================================
+# Keyset cursor
+# =============================================
+
+def encode_cursor(obj, key: tuple) -> str:
+    """Token opaque (base64 JSON) dari nilai kunci urutan baris `obj`."""
+    values = [_json_value(getattr(obj, col.key)) for col in key]
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip("=")
+
+
+def decode_cursor(token: str, key: tuple) -> list:
+    """Kebalikan encode_cursor. Raise ValueError jika token tidak valid."""
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        values = json.loads(raw)
+    except (binascii.Error, UnicodeDecodeError, json.JSONDecodeError) as e:
+        raise ValueError("Cursor tidak valid") from e
+    if not isinstance(values, list) or len(values) != len(key):
+        raise ValueError("Cursor tidak valid")
+
+    parsed = []
+    for col, value in zip(key, values):
+        python_type = col.type.python_type
+        try:
+            if python_type is datetime:
+                parsed.append(datetime.fromisoformat(value))
+            elif python_type is date:
+                parsed.append(date.fromisoformat(value))
+            else:
+                parsed.append(python_type(value))
+        except (TypeError, ValueError) as e:
+            raise ValueError("Cursor tidak valid") from e
+    return parsed
+
+
+# =============================================
+# Streaming NDJSON / CSV
+# =============================================
+
+STREAM_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+
+def _json_value(value):
+    # Sama dengan serialisasi Pydantic di mode JSON: Decimal -> string, date -> ISO
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, date):
+        return value.isoformat()
+    return value
+
+
+async def stream_rows(query: Select, columns: list, fmt: str) -> AsyncIterator[str]:
+    """
+    Iterasi hasil query lewat server-side cursor dan keluarkan NDJSON / CSV per chunk.
+
+    Args:
+        query: Select yang memilih tepat `columns`
+        columns: kolom model yang diexport
+        fmt: "ndjson" atau "csv"
+
+    Session (replica) dibuka sendiri, bukan dari Depends, karena generator
+    masih berjalan setelah handler endpoint selesai.
+    """
+    names = [c.name for c in columns]
+    async with async_session(read=True) as db:
+        result = await db.stream(query.execution_options(yield_per=STREAM_BATCH_SIZE))
+        buf = io.StringIO()
+        writer = csv.writer(buf) if fmt == "csv" else None
+        if writer:
+            writer.writerow(names)
+
+        async for rows in result.partitions():
+            for row in rows:
+                if writer:
+                    writer.writerow(row)
+                else:
+                    buf.write(json.dumps({n: _json_value(v) for n, v in zip(names, row)}))
+                    buf.write("\n")
+            yield buf.getvalue()
+            buf.seek(0)
+            buf.truncate()
+        if buf.tell():
+            yield buf.getvalue()
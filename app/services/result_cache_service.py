@@ -0,0 +1,101 @@
+"""
+result_cache_service.py — Cache hasil query endpoint baca (/history, /summary).
+
+Yang disimpan adalah body JSON yang sudah di-serialize + ETag, jadi cache hit
+tidak menyentuh database maupun Pydantic. Data hanya berubah saat run selesai
+(atau di-reparse), maka cache di-invalidate per rute lewat nomor generasi:
+key query dengan filter rute memuat generasi rute itu saja, key query tanpa
+filter rute memuat generasi global; invalidate_route menaikkan keduanya,
+jadi rute lain tetap ter-cache. Entry lama tidak terpakai lagi
+dan hilang sendiri oleh LRU / TTL.
+
+Invalidasi hanya di proses ini. Run yang dijalankan proses lain
+(`python -m app.worker`) baru terlihat setelah RESULT_CACHE_TTL habis.
+"""
+
+import hashlib
+import threading
+from dataclasses import dataclass, field
+from datetime import date
+
+from app.cache import TTLCache
+from app.config import settings
+
+
+@dataclass
+class CachedResult:
+    body: bytes
+    etag: str
+    headers: dict[str, str] = field(default_factory=dict)
+
+
+def make_etag(body: bytes) -> str:
+    return f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Cek header If-None-Match (boleh daftar dipisah koma, W/ prefix, atau *)."""
+    if not if_none_match:
+        return False
+    candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
+
+
+def _normalize(value):
+    if isinstance(value, date):
+        return value.isoformat()
+    return value
+
+
+class ResultCache:
+    """TTL + LRU cache hasil endpoint, invalidasi per rute."""
+
+    def __init__(self, ttl: float | None = None, maxsize: int | None = None):
+        self.ttl = settings.RESULT_CACHE_TTL if ttl is None else ttl
+        self.memory = TTLCache(
+            maxsize=settings.RESULT_CACHE_MAX_ENTRIES if maxsize is None else maxsize,
+            ttl=self.ttl,
+        )
+        self._generations: dict[str | None, int] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0
+
+    def key(self, endpoint: str, route: str | None, params: dict) -> tuple:
+        """
+        Key dari parameter query yang dinormalisasi (None dibuang, urut nama).
+
+        Args:
+            endpoint: nama endpoint, e.g. "history"
+            route: filter rute (None = semua rute)
+            params: parameter lain yang memengaruhi hasil
+        """
+        normalized = tuple(sorted((k, _normalize(v)) for k, v in params.items() if v is not None))
+        with self._lock:
+            # route None -> generasi global (naik setiap ada rute yang di-invalidate)
+            generation = self._generations.get(route, 0)
+        return endpoint, route, generation, normalized
+
+    def get(self, key: tuple) -> CachedResult | None:
+        if not self.enabled:
+            return None
+        return self.memory.get(key)
+
+    def set(self, key: tuple, result: CachedResult):
+        if self.enabled:
+            self.memory.set(key, result)
+
+    def invalidate_route(self, route: str):
+        """Buang hasil untuk `route` dan query tanpa filter rute."""
+        with self._lock:
+            self._generations[route] = self._generations.get(route, 0) + 1
+            self._generations[None] = self._generations.get(None, 0) + 1
+
+    def clear(self):
+        self.memory.clear()
+
+
+# Instance global, di-invalidate oleh scraper_service
+result_cache = ResultCache()
@@ -0,0 +1,271 @@
+"""
+scheduler_service.py — Scheduler in-process untuk SCHEDULED scrape runs.
+
+Setiap rute punya cron spec sendiri (SCHEDULES di config). Saat cron rute
+cocok, scheduler tidak men-scrape seluruh horizon sekaligus, tapi hanya
+tanggal terbang yang sudah "jatuh tempo" menurut SCHEDULE_TIERS:
+tanggal dekat di-refresh lebih sering daripada tanggal jauh. Jumlah tanggal
+per tick dibatasi supaya beban harian tersebar rata di semua tick.
+
+Rute yang masih punya run QUEUED/RUNNING dilewati; beberapa range tanggal
+dari 1 tick di-claim worker satu per satu (lihat claim_next_job), jadi run
+1 rute tidak overlap. Run RUNNING yang lease-nya habis ditandai FAILED dulu
+(lihat job_service).
+Aktifkan hanya di 1 instance API (SCHEDULER_ENABLED=true).
+"""
+
+import logging
+import math
+import threading
+from datetime import date, datetime, timedelta
+
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models.flight import ScrapeRun
+from app.services.job_service import reap_stale_runs, submit_job
+
+logger = logging.getLogger(__name__)
+
+
+# =============================================
+# Cron spec (minute hour day-of-month month day-of-week)
+# =============================================
+
+_CRON_RANGES = [(0, 59), (0, 23), (1, 31), (1, 12), (0, 6)]
+
+
+def _parse_cron_field(field: str, low: int, high: int) -> set[int]:
+    values: set[int] = set()
+    for part in field.split(","):
+        step = 1
+        if "/" in part:
+            part, step_str = part.split("/", 1)
+            step = int(step_str)
+        if part == "*":
+            start, end = low, high
+        elif "-" in part:
+            start, end = (int(x) for x in part.split("-", 1))
+        else:
+            start = int(part)
+            end = high if step > 1 else start
+        if start < low or end > high or start > end or step < 1:
+            raise ValueError(f"Invalid cron field: {field}")
+        values.update(range(start, end + 1, step))
+    return values
+
+
+class CronSpec:
+    """Cron 5 field standar: `*`, `*/n`, `a-b`, `a-b/n`, `a,b`. Minggu = 0."""
+
+    def __init__(self, expr: str):
+        fields = expr.split()
+        if len(fields) != 5:
+            raise ValueError(f"Cron spec harus 5 field: {expr!r}")
+        self.expr = expr
+        self.minutes, self.hours, self.days, self.months, self.weekdays = (
+            _parse_cron_field(f, lo, hi) for f, (lo, hi) in zip(fields, _CRON_RANGES)
+        )
+        self._dom_any = fields[2] == "*"
+        self._dow_any = fields[4] == "*"
+
+    def matches(self, dt: datetime) -> bool:
+        if dt.minute not in self.minutes or dt.hour not in self.hours or dt.month not in self.months:
+            return False
+        dom = dt.day in self.days
+        dow = (dt.weekday() + 1) % 7 in self.weekdays
+        # Aturan cron: jika dom & dow sama-sama dibatasi, cukup salah satu cocok
+        if self._dom_any or self._dow_any:
+            return dom and dow
+        return dom or dow
+
+    def ticks_per_day(self) -> int:
+        """Perkiraan jumlah tick per hari (dipakai untuk membagi beban)."""
+        return max(1, len(self.minutes) * len(self.hours))
+
+
+# =============================================
+# Date selection
+# =============================================
+
+def _tier_interval(days_ahead: int) -> timedelta | None:
+    """Interval refresh untuk tanggal terbang `days_ahead` hari lagi (None = di luar horizon)."""
+    for tier in settings.SCHEDULE_TIERS:
+        if days_ahead <= tier["max_days"]:
+            return timedelta(hours=tier["every_hours"])
+    return None
+
+
+def _daily_budget(horizon_days: int) -> float:
+    """Total (tanggal x refresh) per hari yang dibutuhkan 1 rute."""
+    budget = 0.0
+    for offset in range(horizon_days + 1):
+        interval = _tier_interval(offset)
+        if interval:
+            budget += timedelta(days=1) / interval
+    return budget
+
+
+def _last_scraped(db: Session, route: str, today: date, horizon_days: int) -> dict[date, datetime]:
+    """
+    Waktu terakhir tiap tanggal terbang tercakup run COMPLETED rute ini.
+
+    Pakai completed_at (ditulis dari jam Python, sama dengan `now` pembanding),
+    bukan scraped_at (now() database, bisa beda timezone dengan aplikasi).
+    """
+    longest = max(timedelta(hours=t["every_hours"]) for t in settings.SCHEDULE_TIERS)
+    runs = db.query(ScrapeRun.completed_at, ScrapeRun.start_date, ScrapeRun.end_date).filter(
+        ScrapeRun.route == route,
+        ScrapeRun.status == "COMPLETED",
+        ScrapeRun.completed_at >= datetime.now() - longest,
+        ScrapeRun.end_date >= today,
+    ).all()
+
+    horizon_end = today + timedelta(days=horizon_days)
+    last: dict[date, datetime] = {}
+    for completed_at, start, end in runs:
+        if start is None or end is None:
+            continue
+        d = max(start, today)
+        while d <= min(end, horizon_end):
+            if d not in last or completed_at > last[d]:
+                last[d] = completed_at
+            d += timedelta(days=1)
+    return last
+
+
+def select_due_dates(
+    last_scraped: dict[date, datetime],
+    now: datetime,
+    horizon_days: int,
+    limit: int,
+) -> list[date]:
+    """
+    Pilih maksimal `limit` tanggal terbang yang jatuh tempo.
+
+    Prioritas: paling lama lewat jatuh tempo (relatif ke interval tier-nya),
+    lalu tanggal terdekat.
+    """
+    today = now.date()
+    candidates = []
+    for offset in range(horizon_days + 1):
+        interval = _tier_interval(offset)
+        if interval is None:
+            continue
+        d = today + timedelta(days=offset)
+        last = last_scraped.get(d)
+        overdue = math.inf if last is None else (now - last) / interval
+        if overdue >= 1:
+            candidates.append((-overdue, offset, d))
+    candidates.sort()
+    return sorted(d for _, _, d in candidates[:limit])
+
+
+def _contiguous_ranges(dates: list[date]) -> list[tuple[date, date]]:
+    ranges: list[tuple[date, date]] = []
+    for d in dates:
+        if ranges and d - ranges[-1][1] == timedelta(days=1):
+            ranges[-1] = (ranges[-1][0], d)
+        else:
+            ranges.append((d, d))
+    return ranges
+
+
+# =============================================
+# Scheduler
+# =============================================
+
+def _load_schedules() -> list[dict]:
+    """SCHEDULES dari config; jika kosong, DEFAULT_ROUTES tiap jam dengan menit berselang."""
+    schedules = settings.SCHEDULES or [
+        {**route, "cron": f"{i * 60 // len(settings.DEFAULT_ROUTES)} * * * *"}
+        for i, route in enumerate(settings.DEFAULT_ROUTES)
+    ]
+    return [
+        {
+            "origin": s["origin"],
+            "destination": s["destination"],
+            "cron": CronSpec(s["cron"]),
+            "horizon_days": s.get("horizon_days", settings.SCHEDULE_HORIZON_DAYS),
+        }
+        for s in schedules
+    ]
+
+
+def run_schedule_tick(db: Session, schedule: dict, now: datetime) -> list[str]:
+    """Submit job SCHEDULED untuk tanggal yang jatuh tempo pada 1 rute. Return run_ids."""
+    origin, destination = schedule["origin"], schedule["destination"]
+    route = f"{origin}-{destination}"
+    horizon_days = schedule["horizon_days"]
+
+    in_flight = db.query(ScrapeRun.id).filter(
+        ScrapeRun.route == route,
+        ScrapeRun.status.in_(("QUEUED", "RUNNING")),
+    ).first()
+    if in_flight:
+        logger.info("Schedule %s dilewati: masih ada run berjalan", route)
+        return []
+
+    limit = math.ceil(_daily_budget(horizon_days) / schedule["cron"].ticks_per_day())
+    last = _last_scraped(db, route, now.date(), horizon_days)
+    due = select_due_dates(last, now, horizon_days, limit)
+
+    run_ids = []
+    for start, end in _contiguous_ranges(due):
+        run = submit_job(db=db, origin=origin, destination=destination,
+                         start_date=start, end_date=end, run_type="SCHEDULED")
+        run_ids.append(run.run_id)
+    return run_ids
+
+
+class Scheduler:
+    """Thread yang mengecek cron semua rute setiap pergantian menit."""
+
+    def __init__(self):
+        self._thread: threading.Thread | None = None
+        self._stop = threading.Event()
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="scheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float | None = None):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _loop(self):
+        schedules = _load_schedules()
+        while True:
+            now = datetime.now()
+            next_minute = (now + timedelta(minutes=1)).replace(second=0, microsecond=0)
+            if self._stop.wait((next_minute - now).total_seconds()):
+                return
+            self._tick(next_minute, schedules)
+
+    def _tick(self, now: datetime, schedules: list[dict]):
+        db = SessionLocal()
+        try:
+            if any(schedule["cron"].matches(now) for schedule in schedules):
+                try:
+                    reap_stale_runs(db)
+                except Exception:
+                    db.rollback()
+                    logger.exception("Reap run yatim gagal")
+            for schedule in schedules:
+                if not schedule["cron"].matches(now):
+                    continue
+                try:
+                    run_schedule_tick(db, schedule, now)
+                except Exception:
+                    db.rollback()
+                    logger.exception("Schedule %s-%s gagal", schedule["origin"], schedule["destination"])
+        finally:
+            db.close()
+
+
+# Instance global, di-start di app.main lifespan jika SCHEDULER_ENABLED
+scheduler = Scheduler()
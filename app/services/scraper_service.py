@@ -2,20 +2,32 @@
 scraper_service.py — Orchestrate scraping dan simpan ke database (3-table structure).
 """
 
+import asyncio
 import time
 import uuid
-import statistics
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date, datetime, timedelta
-from decimal import Decimal
 
-from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy.orm import Session, aliased
+from sqlalchemy import and_, func, select, tuple_, update
 
 from app.config import settings
-from app.models.flight import ScrapeRun, FlightFare, FareDailySummary
-from app.scrapers.garuda import scrape_garuda, URL_GARUDA
-from app.scrapers.citilink import scrape_citilink, URL_CITILINK
-from app.scrapers.bookcabin import scrape_bookcabin, URL_BOOKCABIN
+from app.database import SessionLocal
+from app.models.flight import ScrapeRun, FlightFare, FareDailySummary, RawResponse
+from app.scrapers.garuda import URL_GARUDA
+from app.scrapers.citilink import URL_CITILINK
+from app.scrapers.bookcabin import URL_BOOKCABIN
+from app.scrapers.client import ScraperClient, scraper_client
+from app.services.archive_service import archive_response, save_archive_index, load_raw
+from app.services.export_service import invalidate_export_cache
+from app.services.result_cache_service import result_cache
+from app.services.ingest_service import bulk_insert_fares
+from app.services.summary_service import compute_daily_summary
+from app.services.triangle_service import refresh_triangle
+
+
+# Interval minimum (detik) antar commit progress ScrapeRun
+PROGRESS_INTERVAL = 1.0
 
 
 def generate_dates(start: date, end: date) -> list[str]:
@@ -88,6 +100,81 @@ def _normalize_bookcabin(flight: dict, run_id: str, route: str) -> dict:
     }
 
 
+NORMALIZERS = {
+    "garuda_api": _normalize_garuda,
+    "citilink_api": _normalize_citilink,
+    "bookcabin_api": _normalize_bookcabin,
+}
+SOURCE_URLS = {
+    "garuda_api": URL_GARUDA,
+    "citilink_api": URL_CITILINK,
+    "bookcabin_api": URL_BOOKCABIN,
+}
+SOURCE_TYPES = {
+    "garuda_api": "airline",
+    "citilink_api": "airline",
+    "bookcabin_api": "bookcabin",
+}
+
+
+def _failed_record(run_id: str, route: str, source: str, date_str: str, error: str) -> dict:
+    """Placeholder FAILED untuk 1 (sumber, tanggal) yang gagal di-fetch / parse."""
+    return {
+        "run_id": run_id, "route": route, "airline": "-", "source": source,
+        "travel_date": datetime.strptime(date_str, "%Y-%m-%d").date(),
+        "flight_number": "-", "depart_time": "-", "arrive_time": "-",
+        "basic_fare": 0, "currency": "IDR",
+        "scrape_source_page": SOURCE_URLS[source],
+        "source_type": SOURCE_TYPES[source],
+        "status_scrape": "FAILED", "error_reason": error,
+    }
+
+
+# =============================================
+# Async scrape engine
+# =============================================
+
+async def scrape_async(
+    client: ScraperClient,
+    origin: str,
+    destination: str,
+    dates: list[str],
+    sources: list[str],
+    token: str | None = None,
+    concurrency: int | None = None,
+    cells: list[tuple[str, str]] | None = None,
+):
+    """
+    Fan-out semua kombinasi (sumber x tanggal) sekaligus, dibatasi semaphore.
+    Kecepatan per sumber diatur rate limiter di ScraperClient.
+
+    Jika `cells` (list (source, date_str)) diisi, hanya kombinasi itu yang di-fetch.
+
+    Yields:
+        tuple (source, date_str, raw_data, flights, error) sesuai urutan selesai.
+        raw_data None jika fetch gagal; jika parse gagal raw_data tetap terisi.
+    """
+    sem = asyncio.Semaphore(concurrency or settings.SCRAPE_CONCURRENCY)
+
+    async def _one(src: str, date_str: str):
+        async with sem:
+            data = None
+            try:
+                data = await client.afetch(src, origin, destination, date_str, token)
+                return (src, date_str, data, client.parse(src, data), None)
+            except Exception as e:
+                return (src, date_str, data, [], str(e))
+
+    cells = cells if cells is not None else [(src, d) for d in dates for src in sources]
+    tasks = [asyncio.create_task(_one(src, d)) for src, d in cells]
+    try:
+        for future in asyncio.as_completed(tasks):
+            yield await future
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
 # =============================================
 # Mark lowest fares
 # =============================================
@@ -109,111 +196,152 @@ def _mark_lowest_fares(records: list[dict]) -> list[dict]:
     return records
 
 
-# =============================================
-# Compute daily summary (data turunan)
-# =============================================
-
-def _compute_daily_summary(db: Session, run_id: str, route: str, scrape_dt: date):
-    """Hitung agregasi harian dan simpan ke fare_daily_summary."""
-    fares = db.query(FlightFare).filter(
-        FlightFare.run_id == run_id,
-        FlightFare.status_scrape == "SUCCESS",
-    ).all()
-
-    if not fares:
+def _remark_lowest_fares(db: Session, run: ScrapeRun, travel_dates: list[date]):
+    """Seperti _mark_lowest_fares, tapi di DB untuk baris run yang sudah tersimpan (resume)."""
+    if not travel_dates:
         return
-
-    # Group by airline + travel_date
-    groups: dict[str, list[FlightFare]] = {}
-    for f in fares:
-        key = f"{f.airline}|{f.travel_date}"
-        groups.setdefault(key, []).append(f)
-
-    # Group by travel_date only (untuk cheapest_airline_per_day)
-    by_date: dict[date, list[FlightFare]] = {}
-    for f in fares:
-        by_date.setdefault(f.travel_date, []).append(f)
-
-    # Hitung cheapest airline per date
-    cheapest_airline_map: dict[date, str] = {}
-    for td, date_fares in by_date.items():
-        cheapest = min(date_fares, key=lambda x: float(x.basic_fare))
-        cheapest_airline_map[td] = cheapest.airline
-
-    # Hitung summary per airline + travel_date
-    for key, group_fares in groups.items():
-        airline = group_fares[0].airline
-        travel_dt = group_fares[0].travel_date
-        prices = [float(f.basic_fare) for f in group_fares]
-
-        daily_min = min(prices)
-        daily_max = max(prices)
-        daily_avg = sum(prices) / len(prices)
-        vol = statistics.stdev(prices) if len(prices) > 1 else 0.0
-
-        # Price change DoD: bandingkan dengan scrape sebelumnya
-        prev_summary = db.query(FareDailySummary).filter(
-            FareDailySummary.route == route,
-            FareDailySummary.airline == airline,
-            FareDailySummary.travel_date == travel_dt,
-            FareDailySummary.scrape_date < scrape_dt,
-        ).order_by(FareDailySummary.scrape_date.desc()).first()
-
-        dod = None
-        if prev_summary and prev_summary.daily_min_price:
-            dod = Decimal(str(daily_min)) - prev_summary.daily_min_price
-
-        summary = FareDailySummary(
-            route=route,
-            airline=airline,
-            travel_date=travel_dt,
-            scrape_date=scrape_dt,
-            daily_min_price=daily_min,
-            daily_avg_price=round(daily_avg, 2),
-            daily_max_price=daily_max,
-            price_change_dod=dod,
-            volatility=round(vol, 2),
-            cheapest_airline_per_day=cheapest_airline_map.get(travel_dt, ""),
-            cheapest_route_per_day=route,
-        )
-        db.add(summary)
-
-    db.commit()
+    other = aliased(FlightFare)
+    min_fare = select(func.min(other.basic_fare)).where(
+        other.scrape_date == run.scrape_date,
+        other.run_id == run.run_id,
+        other.airline == FlightFare.airline,
+        other.travel_date == FlightFare.travel_date,
+        other.status_scrape == "SUCCESS",
+    ).scalar_subquery()
+    db.query(FlightFare).filter(
+        FlightFare.scrape_date == run.scrape_date,
+        FlightFare.run_id == run.run_id,
+        FlightFare.travel_date.in_(travel_dates),
+    ).update(
+        {FlightFare.is_lowest_fare: and_(FlightFare.status_scrape == "SUCCESS", FlightFare.basic_fare == min_fare)},
+        synchronize_session=False,
+    )
 
 
 # =============================================
 # Main scrape orchestrator
 # =============================================
 
-def scrape_and_save(
+def create_run(
     db: Session,
     origin: str,
     destination: str,
     start_date: date,
     end_date: date,
-    citilink_token: str | None = None,
     run_type: str = "MANUAL",
-) -> dict:
-    """Scrape semua tanggal, simpan ke DB, hitung summary."""
-
-    run_id = str(uuid.uuid4())
-    scrape_dt = date.today()
-    route = f"{origin}-{destination}"
-    token = citilink_token or settings.CITILINK_TOKEN
-    dates = generate_dates(start_date, end_date)
-
-    # 1. Buat ScrapeRun record
+    status: str = "RUNNING",
+    citilink_requested: bool = False,
+) -> ScrapeRun:
+    """Buat record ScrapeRun (RUNNING untuk eksekusi langsung, QUEUED untuk job)."""
     run = ScrapeRun(
-        run_id=run_id,
+        run_id=str(uuid.uuid4()),
         run_type=run_type,
-        scrape_date=scrape_dt,
-        route=route,
-        status="RUNNING",
+        scrape_date=date.today(),
+        route=f"{origin}-{destination}",
+        status=status,
+        start_date=start_date,
+        end_date=end_date,
+        citilink_requested=citilink_requested,
     )
     db.add(run)
     db.commit()
+    return run
+
+
+def run_sources(citilink_token: str | None = None) -> list[str]:
+    """Sumber yang di-scrape; Citilink hanya jika ada token (argumen atau settings)."""
+    sources = ["garuda_api", "bookcabin_api"]
+    if citilink_token or settings.CITILINK_TOKEN:
+        sources.append("citilink_api")
+    return sources
+
+
+def check_resumable(db: Session, run: ScrapeRun, citilink_token: str | None = None):
+    """
+    Validasi run boleh di-resume dengan token ini.
+
+    Harga hasil fetch hari ini tidak boleh dicatat dengan scrape_date lama
+    (segitiga & summary jadi campur 2 hari), jadi hanya run dari hari ini yang
+    bisa di-resume; run lama di-scrape ulang sebagai run baru. Run yang
+    tertinggal RUNNING karena prosesnya mati bisa di-resume setelah
+    ditandai FAILED oleh reaper di job_service.
+
+    Raises:
+        ValueError: run masih QUEUED / RUNNING, scrape_date bukan hari ini,
+            atau punya baris sumber yang tidak bisa di-scrape ulang
+            (Citilink tanpa token).
+    """
+    if run.status in ("QUEUED", "RUNNING"):
+        raise ValueError(f"Run {run.run_id} masih {run.status}")
+    if run.scrape_date != date.today():
+        raise ValueError(f"Run {run.run_id} dari scrape_date {run.scrape_date}, "
+                         "hanya run hari ini yang bisa di-resume")
+    used = {src for (src,) in db.query(FlightFare.source).filter(
+        FlightFare.scrape_date == run.scrape_date, FlightFare.run_id == run.run_id,
+    ).distinct()}
+    missing = used - set(run_sources(citilink_token))
+    if missing:
+        raise ValueError(f"Run {run.run_id} butuh token untuk {', '.join(sorted(missing))}")
+
+
+def _rebuild_summary(db: Session, run: ScrapeRun):
+    """
+    Hitung ulang summary rute untuk scrape_date run (resume / reparse), belum di-commit.
+
+    Summary tidak menyimpan run_id, jadi baris run ini tidak bisa dipisah dari
+    run lain rute + scrape_date yang sama: semuanya dihapus lalu dibangun ulang
+    dari setiap run COMPLETED hari itu (urut waktu selesai, yang terbaru menang)
+    ditambah run ini.
+    """
+    db.query(FareDailySummary).filter(
+        FareDailySummary.route == run.route,
+        FareDailySummary.scrape_date == run.scrape_date,
+    ).delete(synchronize_session=False)
+    others = db.query(ScrapeRun.run_id).filter(
+        ScrapeRun.route == run.route,
+        ScrapeRun.scrape_date == run.scrape_date,
+        ScrapeRun.status == "COMPLETED",
+        ScrapeRun.id != run.id,
+    ).order_by(ScrapeRun.completed_at.asc().nulls_first(), ScrapeRun.id)
+    for run_id in [rid for (rid,) in others] + [run.run_id]:
+        compute_daily_summary(db, run_id, run.route, run.scrape_date)
+
+
+def execute_run(
+    db: Session,
+    run: ScrapeRun,
+    citilink_token: str | None = None,
+    client: ScraperClient | None = None,
+) -> dict:
+    """
+    Jalankan scraping untuk 1 ScrapeRun, simpan ke DB, hitung summary.
+
+    Bisa dipanggil ulang untuk run yang gagal di tengah jalan: (sumber, tanggal)
+    yang sudah punya baris SUCCESS dilewati, lihat resume_run.
+    """
+    try:
+        return _execute_run(db, run, citilink_token, client or scraper_client)
+    except Exception as e:
+        db.rollback()
+        run.status = "FAILED"
+        run.error_reason = str(e)
+        db.commit()
+        raise
+
+
+def _execute_run(db: Session, run: ScrapeRun, citilink_token: str | None, client: ScraperClient) -> dict:
+    run_id = run.run_id
+    scrape_dt = run.scrape_date
+    route = run.route
+    origin, destination = route.split("-", 1)
+    token = citilink_token or settings.CITILINK_TOKEN
+    dates = generate_dates(run.start_date, run.end_date)
+    sources = run_sources(token)
 
-    all_records: list[dict] = []
+    # Buffer per tanggal terbang: ditulis begitu semua sumber tanggal itu selesai
+    pending: dict[str, list[dict]] = {}
+    pending_archive: dict[str, list[dict]] = {}
+    total_records = 0
     total_errors = 0
     stats = {
         "garuda_api": {"total_flights": 0, "total_dates": 0, "errors": 0},
@@ -221,108 +349,300 @@ def scrape_and_save(
         "bookcabin_api": {"total_flights": 0, "total_dates": 0, "errors": 0},
     }
 
-    # 2. Scrape per tanggal (3 airlines in PARALLEL per date)
-    from concurrent.futures import ThreadPoolExecutor, as_completed
-
-    def _scrape_garuda_safe(date_str):
-        try:
-            flights = scrape_garuda(origin, destination, date_str)
-            return ("garuda_api", date_str, flights, None)
-        except Exception as e:
-            return ("garuda_api", date_str, [], str(e))
-
-    def _scrape_citilink_safe(date_str):
-        try:
-            flights = scrape_citilink(origin, destination, date_str, token)
-            return ("citilink_api", date_str, flights, None)
-        except Exception as e:
-            return ("citilink_api", date_str, [], str(e))
-
-    def _scrape_bookcabin_safe(date_str):
-        try:
-            flights = scrape_bookcabin(origin, destination, date_str)
-            return ("bookcabin_api", date_str, flights, None)
-        except Exception as e:
-            return ("bookcabin_api", date_str, [], str(e))
-
-    normalizers = {
-        "garuda_api": _normalize_garuda,
-        "citilink_api": _normalize_citilink,
-        "bookcabin_api": _normalize_bookcabin,
-    }
-    source_urls = {
-        "garuda_api": URL_GARUDA,
-        "citilink_api": URL_CITILINK,
-        "bookcabin_api": URL_BOOKCABIN,
-    }
-    source_types = {
-        "garuda_api": "airline",
-        "citilink_api": "airline",
-        "bookcabin_api": "bookcabin",
+    # 1. Resume: (sumber, tanggal) yang sudah punya baris SUCCESS dilewati,
+    #    placeholder FAILED sumber aktif dihapus lalu di-fetch ulang. Filter
+    #    scrape_date supaya hanya partisi bulan run ini yang disentuh.
+    in_run = (FlightFare.scrape_date == scrape_dt, FlightFare.run_id == run_id)
+    done = {
+        (src, td.strftime("%Y-%m-%d"))
+        for src, td in db.query(FlightFare.source, FlightFare.travel_date).filter(
+            *in_run, FlightFare.status_scrape == "SUCCESS",
+        ).distinct()
     }
-
-    for date_str in dates:
-        # Launch 3 scrapers in parallel
-        with ThreadPoolExecutor(max_workers=3) as executor:
-            futures = [
-                executor.submit(_scrape_garuda_safe, date_str),
-                executor.submit(_scrape_bookcabin_safe, date_str),
-            ]
-            if token:
-                futures.append(executor.submit(_scrape_citilink_safe, date_str))
-
-            for future in as_completed(futures):
-                src, ds, flights, error = future.result()
-
-                if error:
-                    stats[src]["errors"] += 1
-                    total_errors += 1
-                    all_records.append({
-                        "run_id": run_id, "route": route, "airline": "-", "source": src,
-                        "travel_date": datetime.strptime(ds, "%Y-%m-%d").date(),
-                        "flight_number": "-", "depart_time": "-", "arrive_time": "-",
-                        "basic_fare": 0, "currency": "IDR",
-                        "scrape_source_page": source_urls[src],
-                        "source_type": source_types[src],
-                        "status_scrape": "FAILED", "error_reason": error,
-                    })
-                else:
-                    normalize_fn = normalizers[src]
-                    for f in flights:
-                        all_records.append(normalize_fn(f, run_id, route))
-                    stats[src]["total_flights"] += len(flights)
-                    if flights:
-                        stats[src]["total_dates"] += 1
-
-        # 1 delay per date batch (not per scraper)
-        time.sleep(settings.SCRAPE_DELAY)
-
-    # 3. Mark lowest fares
-    if all_records:
-        all_records = _mark_lowest_fares(all_records)
-
-    # 4. Bulk insert flight_fares
-    for r in all_records:
-        db.add(FlightFare(**r))
+    retried = db.query(FlightFare).filter(
+        *in_run, FlightFare.status_scrape == "FAILED", FlightFare.source.in_(sources),
+    ).delete(synchronize_session=False)
+    resumed = bool(done or retried)
+    if resumed:
+        total_records = db.query(func.count(FlightFare.id)).filter(*in_run).scalar()
+        total_errors = db.query(func.count(FlightFare.id)).filter(
+            *in_run, FlightFare.status_scrape == "FAILED",
+        ).scalar()
+    cells = [(src, ds) for ds in dates for src in sources if (src, ds) not in done]
+    if resumed and cells:
+        # Arsip lama cell yang di-fetch ulang diganti arsip baru (reparse tidak dobel)
+        db.query(RawResponse).filter(
+            RawResponse.run_id == run_id,
+            tuple_(RawResponse.source, RawResponse.travel_date).in_(
+                [(src, datetime.strptime(ds, "%Y-%m-%d").date()) for src, ds in cells]),
+        ).delete(synchronize_session=False)
+
+    # 2. Tandai ScrapeRun mulai jalan + set total progress
+    run.status = "RUNNING"
+    run.error_reason = None
+    run.total_tasks = len(dates) * len(sources)
+    run.completed_tasks = completed = run.total_tasks - len(cells)
+    run.total_records = total_records
+    run.total_errors = total_errors
+    run.heartbeat_at = datetime.now()
     db.commit()
 
-    # 5. Update ScrapeRun status
+    # 3. Scrape (sumber x tanggal) yang tersisa secara async, concurrency dibatasi
+    last_progress = time.monotonic()
+    remaining: dict[str, int] = {}
+    for _, ds in cells:
+        remaining[ds] = remaining.get(ds, 0) + 1
+
+    def _persist_date(ds: str):
+        """Mark lowest fares + bulk insert 1 tanggal (COPY / executemany), commit bersama progress."""
+        nonlocal total_records
+        records = _mark_lowest_fares(pending.pop(ds, []))
+        total_records += bulk_insert_fares(db, records, scrape_date=scrape_dt)
+        save_archive_index(db, pending_archive.pop(ds, []))
+        run.total_records = total_records
+        run.total_errors = total_errors
+        run.completed_tasks = completed
+        run.heartbeat_at = datetime.now()
+        db.commit()
+
+    def _commit_progress():
+        run.completed_tasks = completed
+        run.total_errors = total_errors
+        run.heartbeat_at = datetime.now()
+        db.commit()
+
+    # Arsip (zstd + file) dan COPY + commit adalah I/O blocking: dijalankan di
+    # thread (berurutan, session tidak dipakai bersamaan) supaya fetch lain
+    # di event loop tetap jalan
+    async def _consume():
+        nonlocal total_errors, completed, last_progress
+        async for src, ds, data, flights, error in scrape_async(client, origin, destination, dates, sources,
+                                                                token, cells=cells):
+            if data is not None and settings.ARCHIVE_ENABLED:
+                pending_archive.setdefault(ds, []).append(
+                    await asyncio.to_thread(archive_response, run_id, src, ds, data))
+
+            records = pending.setdefault(ds, [])
+            if error:
+                stats[src]["errors"] += 1
+                total_errors += 1
+                records.append(_failed_record(run_id, route, src, ds, error))
+            else:
+                normalize_fn = NORMALIZERS[src]
+                for f in flights:
+                    records.append(normalize_fn(f, run_id, route))
+                stats[src]["total_flights"] += len(flights)
+                if flights:
+                    stats[src]["total_dates"] += 1
+
+            # Tanggal lengkap (semua sumber) langsung ditulis, sisanya progress saja
+            # (commit maksimal 1x per PROGRESS_INTERVAL untuk polling job)
+            completed += 1
+            remaining[ds] -= 1
+            if remaining[ds] == 0:
+                await asyncio.to_thread(_persist_date, ds)
+                last_progress = time.monotonic()
+            elif time.monotonic() - last_progress >= PROGRESS_INTERVAL:
+                await asyncio.to_thread(_commit_progress)
+                last_progress = time.monotonic()
+
+    asyncio.run(_consume())
+
+    # 4. Data turunan (summary + baris segitiga export) lalu status COMPLETED
+    #    dalam 1 transaksi, supaya run COMPLETED selalu punya summary. Resume:
+    #    lowest fare tanggal yang di-fetch ulang dihitung bersama baris lama
+    if resumed:
+        _remark_lowest_fares(db, run, sorted({datetime.strptime(ds, "%Y-%m-%d").date() for ds in remaining}))
+        _rebuild_summary(db, run)
+    else:
+        compute_daily_summary(db, run_id, route, scrape_dt)
+    refresh_triangle(db, route, scrape_dt)
     run.status = "COMPLETED"
-    run.total_records = len(all_records)
+    run.completed_at = datetime.now()
+    run.total_records = total_records
     run.total_errors = total_errors
+    run.completed_tasks = completed
     db.commit()
-
-    # 6. Compute daily summary (data turunan)
-    _compute_daily_summary(db, run_id, route, scrape_dt)
+    result_cache.invalidate_route(route)
 
     return {
         "run_id": run_id,
         "route": route,
-        "start_date": start_date,
-        "end_date": end_date,
-        "run_type": run_type,
-        "total_records": len(all_records),
+        "start_date": run.start_date,
+        "end_date": run.end_date,
+        "run_type": run.run_type,
+        "total_records": total_records,
         "stats": [
             {"source": src, **data} for src, data in stats.items()
         ],
     }
+
+
+def scrape_and_save(
+    db: Session,
+    origin: str,
+    destination: str,
+    start_date: date,
+    end_date: date,
+    citilink_token: str | None = None,
+    run_type: str = "MANUAL",
+    client: ScraperClient | None = None,
+) -> dict:
+    """Scrape semua tanggal, simpan ke DB, hitung summary."""
+    run = create_run(db, origin, destination, start_date, end_date, run_type=run_type)
+    return execute_run(db, run, citilink_token=citilink_token, client=client)
+
+
+def resume_run(
+    db: Session,
+    run_id: str,
+    citilink_token: str | None = None,
+    client: ScraperClient | None = None,
+) -> dict | None:
+    """
+    Lanjutkan run yang gagal di tengah jalan tanpa mengulang tanggal yang sudah beres.
+
+    Hanya (sumber, tanggal) yang belum punya baris SUCCESS yang di-fetch ulang:
+    placeholder FAILED dan tanggal yang belum sempat ditulis. Fetch sukses
+    tanpa penerbangan tidak meninggalkan baris, jadi ikut di-fetch ulang.
+    Total, lowest fare tanggal terkait, summary, dan segitiga dihitung ulang.
+
+    Returns:
+        dict seperti scrape_and_save, atau None jika run tidak ditemukan.
+
+    Raises:
+        ValueError: lihat check_resumable.
+    """
+    run = db.query(ScrapeRun).filter(ScrapeRun.run_id == run_id).first()
+    if run is None:
+        return None
+    check_resumable(db, run, citilink_token)
+    # Claim bersyarat supaya 2 request resume bersamaan tidak jalan dobel
+    claimed = db.execute(
+        update(ScrapeRun)
+        .where(ScrapeRun.id == run.id, ScrapeRun.status.in_(("FAILED", "COMPLETED")))
+        .values(status="RUNNING", heartbeat_at=datetime.now())
+    ).rowcount
+    db.commit()
+    db.refresh(run)
+    if not claimed:
+        raise ValueError(f"Run {run_id} masih {run.status}")
+    return execute_run(db, run, citilink_token=citilink_token, client=client)
+
+
+def reparse_run(db: Session, run_id: str) -> dict | None:
+    """
+    Regenerate flight_fares 1 run dari arsip raw response, tanpa network.
+
+    Hanya (sumber, tanggal) yang ada di arsip yang ditulis ulang; placeholder
+    FAILED untuk fetch yang gagal tetap dipertahankan. Summary rute untuk
+    scrape_date run dan baris segitiga export dihitung ulang.
+
+    Returns:
+        dict seperti scrape_and_save, atau None jika run tidak ditemukan.
+
+    Raises:
+        ValueError: jika run masih QUEUED / RUNNING, atau tidak punya arsip
+            (ARCHIVE_ENABLED mati saat run jalan).
+    """
+    run = db.query(ScrapeRun).filter(ScrapeRun.run_id == run_id).first()
+    if run is None:
+        return None
+    if run.status in ("QUEUED", "RUNNING"):
+        raise ValueError(f"Run {run_id} masih {run.status}")
+
+    # 1 arsip per (sumber, tanggal): yang terbaru (run lama bisa punya arsip dobel)
+    archived = list({
+        (raw.source, raw.travel_date): raw
+        for raw in db.query(RawResponse).filter(RawResponse.run_id == run_id).order_by(RawResponse.id)
+    }.values())
+    if not archived:
+        raise ValueError(f"Run {run_id} tidak punya arsip raw response")
+    stats = {src: {"total_flights": 0, "total_dates": 0, "errors": 0} for src in NORMALIZERS}
+    records: list[dict] = []
+    cells = set()
+
+    for raw in archived:
+        ds = raw.travel_date.strftime("%Y-%m-%d")
+        cells.add((raw.source, raw.travel_date))
+        try:
+            flights = ScraperClient.parse(raw.source, load_raw(raw.content_hash, raw.codec))
+        except Exception as e:
+            stats[raw.source]["errors"] += 1
+            records.append(_failed_record(run_id, run.route, raw.source, ds, str(e)))
+            continue
+        normalize_fn = NORMALIZERS[raw.source]
+        records.extend(normalize_fn(f, run_id, run.route) for f in flights)
+        stats[raw.source]["total_flights"] += len(flights)
+        if flights:
+            stats[raw.source]["total_dates"] += 1
+
+    # Filter scrape_date supaya hanya partisi bulan run ini yang disentuh
+    in_run = (FlightFare.scrape_date == run.scrape_date, FlightFare.run_id == run_id)
+    if cells:
+        db.query(FlightFare).filter(
+            *in_run,
+            tuple_(FlightFare.source, FlightFare.travel_date).in_(cells),
+        ).delete(synchronize_session=False)
+
+    bulk_insert_fares(db, _mark_lowest_fares(records), scrape_date=run.scrape_date)
+
+    # Hitung ulang total dari DB (termasuk FAILED yang tidak ada di arsip)
+    run.total_records = db.query(func.count(FlightFare.id)).filter(*in_run).scalar()
+    run.total_errors = db.query(func.count(FlightFare.id)).filter(
+        *in_run, FlightFare.status_scrape == "FAILED",
+    ).scalar()
+
+    _rebuild_summary(db, run)
+    refresh_triangle(db, run.route, run.scrape_date)
+    db.commit()
+    # Reparse tidak mengubah run_id terakhir, jadi cache export rute dibuang manual
+    invalidate_export_cache(run.route)
+    result_cache.invalidate_route(run.route)
+
+    return {
+        "run_id": run_id,
+        "route": run.route,
+        "start_date": run.start_date,
+        "end_date": run.end_date,
+        "run_type": run.run_type,
+        "total_records": run.total_records,
+        "stats": [
+            {"source": src, **data} for src, data in stats.items()
+        ],
+    }
+
+
+def scrape_routes(
+    routes: list[dict],
+    start_date: date,
+    end_date: date,
+    citilink_token: str | None = None,
+    run_type: str = "MANUAL",
+    concurrency: int | None = None,
+) -> list[dict]:
+    """
+    Scrape beberapa rute secara paralel.
+
+    Setiap rute jalan di thread sendiri dengan DB session dan run_id sendiri;
+    jumlah rute yang jalan bersamaan dibatasi BULK_ROUTES_CONCURRENCY.
+    Hasil dikembalikan sesuai urutan `routes`.
+    """
+    def _scrape_route(route: dict) -> dict:
+        db = SessionLocal()
+        try:
+            return scrape_and_save(
+                db=db,
+                origin=route["origin"],
+                destination=route["destination"],
+                start_date=start_date,
+                end_date=end_date,
+                citilink_token=citilink_token,
+                run_type=run_type,
+            )
+        finally:
+            db.close()
+
+    max_workers = concurrency or settings.BULK_ROUTES_CONCURRENCY
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="route") as executor:
+        return list(executor.map(_scrape_route, routes))
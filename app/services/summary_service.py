@@ -0,0 +1,146 @@
+"""
+summary_service.py — Hitung data turunan (fare_daily_summary) dari 1 scrape run.
+
+PostgreSQL: 1 statement `INSERT ... SELECT` set-based (GROUP BY + stddev_samp
++ LATERAL join ke summary scrape_date sebelumnya untuk DoD).
+Backend lain (SQLite): fallback Python, dengan 1 query batch untuk DoD.
+
+Rute yang di-scrape beberapa kali sehari (scheduler) tetap punya 1 baris per
+(route, airline, travel_date, scrape_date): baris hari itu untuk (airline,
+travel_date) yang ada di run ini diganti, bukan ditambah.
+"""
+
+import statistics
+from datetime import date
+from decimal import Decimal
+
+from sqlalchemy import select, text, tuple_
+from sqlalchemy.orm import Session
+
+from app.models.flight import FlightFare, FareDailySummary
+
+
+_SUMMARY_SQL = text("""
+    INSERT INTO fare_daily_summary (
+        route, airline, travel_date, scrape_date,
+        daily_min_price, daily_avg_price, daily_max_price,
+        price_change_dod, volatility,
+        cheapest_airline_per_day, cheapest_route_per_day
+    )
+    WITH fares AS (
+        SELECT airline, travel_date, basic_fare
+        FROM flight_fares
+        WHERE scrape_date = :scrape_date AND run_id = :run_id AND status_scrape = 'SUCCESS'
+    ),
+    agg AS (
+        SELECT airline, travel_date,
+               MIN(basic_fare) AS min_price,
+               ROUND(AVG(basic_fare), 2) AS avg_price,
+               MAX(basic_fare) AS max_price,
+               COALESCE(ROUND(stddev_samp(basic_fare), 2), 0) AS volatility
+        FROM fares
+        GROUP BY airline, travel_date
+    ),
+    cheapest AS (
+        SELECT DISTINCT ON (travel_date) travel_date, airline
+        FROM fares
+        ORDER BY travel_date, basic_fare
+    )
+    SELECT :route, a.airline, a.travel_date, :scrape_date,
+           a.min_price, a.avg_price, a.max_price,
+           a.min_price - NULLIF(prev.daily_min_price, 0),
+           a.volatility,
+           COALESCE(c.airline, ''), :route
+    FROM agg a
+    LEFT JOIN cheapest c ON c.travel_date = a.travel_date
+    LEFT JOIN LATERAL (
+        SELECT s.daily_min_price
+        FROM fare_daily_summary s
+        WHERE s.route = :route
+          AND s.airline = a.airline
+          AND s.travel_date = a.travel_date
+          AND s.scrape_date < :scrape_date
+        ORDER BY s.scrape_date DESC
+        LIMIT 1
+    ) prev ON TRUE
+""")
+
+
+def _compute_daily_summary_sql(db: Session, run_id: str, route: str, scrape_dt: date):
+    db.execute(_SUMMARY_SQL, {"run_id": run_id, "route": route, "scrape_date": scrape_dt})
+
+
+def _compute_daily_summary_py(db: Session, run_id: str, route: str, scrape_dt: date):
+    fares = db.query(FlightFare.airline, FlightFare.travel_date, FlightFare.basic_fare).filter(
+        FlightFare.scrape_date == scrape_dt,
+        FlightFare.run_id == run_id,
+        FlightFare.status_scrape == "SUCCESS",
+    ).all()
+
+    if not fares:
+        return
+
+    # Group by airline + travel_date
+    groups: dict[tuple[str, date], list[float]] = {}
+    for airline, travel_dt, fare in fares:
+        groups.setdefault((airline, travel_dt), []).append(float(fare))
+
+    # Hitung cheapest airline per date
+    cheapest_map: dict[date, tuple[float, str]] = {}
+    for airline, travel_dt, fare in fares:
+        price = float(fare)
+        if travel_dt not in cheapest_map or price < cheapest_map[travel_dt][0]:
+            cheapest_map[travel_dt] = (price, airline)
+
+    # Price change DoD: ambil summary scrape sebelumnya dalam 1 query (bukan N+1)
+    travel_dates = {td for _, td in groups}
+    prev_rows = db.query(
+        FareDailySummary.airline, FareDailySummary.travel_date, FareDailySummary.daily_min_price,
+    ).filter(
+        FareDailySummary.route == route,
+        FareDailySummary.travel_date.in_(travel_dates),
+        FareDailySummary.scrape_date < scrape_dt,
+    ).order_by(FareDailySummary.scrape_date).all()
+    prev_min = {(airline, td): price for airline, td, price in prev_rows}
+
+    rows = []
+    for (airline, travel_dt), prices in groups.items():
+        daily_min = min(prices)
+        prev = prev_min.get((airline, travel_dt))
+        rows.append({
+            "route": route,
+            "airline": airline,
+            "travel_date": travel_dt,
+            "scrape_date": scrape_dt,
+            "daily_min_price": daily_min,
+            "daily_avg_price": round(sum(prices) / len(prices), 2),
+            "daily_max_price": max(prices),
+            "price_change_dod": Decimal(str(daily_min)) - prev if prev else None,
+            "volatility": round(statistics.stdev(prices), 2) if len(prices) > 1 else 0.0,
+            "cheapest_airline_per_day": cheapest_map[travel_dt][1],
+            "cheapest_route_per_day": route,
+        })
+    db.execute(FareDailySummary.__table__.insert(), rows)
+
+
+def _clear_replaced(db: Session, run_id: str, route: str, scrape_dt: date):
+    """Hapus summary hari itu untuk (airline, travel_date) yang dihasilkan run ini."""
+    cells = select(FlightFare.airline, FlightFare.travel_date).where(
+        FlightFare.scrape_date == scrape_dt,
+        FlightFare.run_id == run_id,
+        FlightFare.status_scrape == "SUCCESS",
+    ).distinct()
+    db.query(FareDailySummary).filter(
+        FareDailySummary.route == route,
+        FareDailySummary.scrape_date == scrape_dt,
+        tuple_(FareDailySummary.airline, FareDailySummary.travel_date).in_(cells),
+    ).delete(synchronize_session=False)
+
+
+def compute_daily_summary(db: Session, run_id: str, route: str, scrape_dt: date):
+    """Hitung agregasi harian 1 run ke fare_daily_summary, ganti baris hari itu (belum di-commit)."""
+    _clear_replaced(db, run_id, route, scrape_dt)
+    if db.get_bind().dialect.name == "postgresql":
+        _compute_daily_summary_sql(db, run_id, route, scrape_dt)
+    else:
+        _compute_daily_summary_py(db, run_id, route, scrape_dt)
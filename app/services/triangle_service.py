@@ -0,0 +1,67 @@
+"""
+triangle_service.py — Materialized segitiga harga (fare_triangle) untuk export.
+
+Setiap ScrapeRun selesai, hanya baris scrape_date run tersebut yang dihitung
+ulang (DELETE + INSERT ... SELECT GROUP BY), sehingga export cukup membaca
+fare_triangle tanpa menyentuh seluruh history flight_fares.
+"""
+
+from datetime import date
+
+from sqlalchemy import delete, func, insert, select, text
+from sqlalchemy.orm import Session
+
+from app.models.flight import FlightFare, ScrapeRun, FareTriangle
+
+
+def _cells_select(route: str | None = None, scrape_dt: date | None = None):
+    """SELECT harga termurah per (route, airline, scrape_date, travel_date)."""
+    stmt = select(
+        FlightFare.route, FlightFare.airline, ScrapeRun.scrape_date, FlightFare.travel_date,
+        func.min(FlightFare.basic_fare),
+    ).join(
+        ScrapeRun, FlightFare.run_id == ScrapeRun.run_id,
+    ).where(
+        FlightFare.status_scrape == "SUCCESS",
+    ).group_by(
+        FlightFare.route, FlightFare.airline, ScrapeRun.scrape_date, FlightFare.travel_date,
+    )
+    if route:
+        stmt = stmt.where(FlightFare.route == route)
+    if scrape_dt:
+        # Filter di flight_fares juga, supaya hanya partisi bulan itu yang dibaca
+        stmt = stmt.where(ScrapeRun.scrape_date == scrape_dt, FlightFare.scrape_date == scrape_dt)
+    return stmt
+
+
+def _insert_cells(db: Session, route: str | None = None, scrape_dt: date | None = None):
+    columns = ["route", "airline", "scrape_date", "travel_date", "min_fare"]
+    db.execute(insert(FareTriangle).from_select(columns, _cells_select(route, scrape_dt)))
+
+
+def refresh_triangle(db: Session, route: str, scrape_dt: date):
+    """Hitung ulang 1 baris segitiga (route, scrape_date), belum di-commit."""
+    if db.get_bind().dialect.name == "postgresql":
+        # Serialisasi refresh per rute (2 run rute sama bisa selesai bersamaan)
+        db.execute(text("SELECT pg_advisory_xact_lock(hashtext(:key))"), {"key": f"fare_triangle:{route}"})
+    db.execute(delete(FareTriangle).where(
+        FareTriangle.route == route,
+        FareTriangle.scrape_date == scrape_dt,
+    ))
+    _insert_cells(db, route, scrape_dt)
+
+
+def rebuild_triangle(db: Session, route: str | None = None):
+    """Bangun ulang seluruh segitiga (backfill history), opsional per rute."""
+    stmt = delete(FareTriangle)
+    if route:
+        stmt = stmt.where(FareTriangle.route == route)
+    db.execute(stmt)
+    _insert_cells(db, route)
+    db.commit()
+
+
+def ensure_triangle_backfilled(db: Session):
+    """Backfill sekali jika fare_triangle masih kosong tapi flight_fares sudah berisi."""
+    if db.query(FareTriangle.id).first() is None and db.query(FlightFare.id).first() is not None:
+        rebuild_triangle(db)
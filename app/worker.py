@@ -0,0 +1,39 @@
+"""
+Aero — Scrape job worker.
+
+Proses terpisah yang mengambil job dari antrian scrape_runs, supaya jumlah
+worker bisa di-scale terpisah dari API. Jalankan dengan:
+
+    python -m app.worker --workers 4
+"""
+
+import argparse
+import logging
+import signal
+import threading
+
+from app.config import settings
+from app.scrapers.client import scraper_client
+from app.services.job_service import JobWorker
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Aero scrape job worker")
+    parser.add_argument("--workers", type=int, default=max(1, settings.JOB_WORKERS))
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    stop = threading.Event()
+    signal.signal(signal.SIGINT, lambda *_: stop.set())
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+
+    worker = JobWorker(workers=args.workers)
+    worker.start()
+    stop.wait()
+    worker.stop()
+    scraper_client.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+"""
+bench_indexes.py — Bandingkan query plan sebelum / sesudah index di app/models/flight.py.
+
+Hanya PostgreSQL. Untuk "sebelum", index baru di-DROP (dan index airline
+btree lama dibuat ulang) di dalam transaksi yang kemudian di-ROLLBACK, jadi
+schema tidak berubah. DROP INDEX mengunci tabel selama transaksi: jalankan
+di database dev / staging, bukan production.
+
+    python -m scripts.bench_indexes --seed 500000
+    python -m scripts.bench_indexes --verbose
+"""
+
+import argparse
+import random
+import uuid
+from datetime import date, timedelta
+
+from sqlalchemy import create_engine, func, text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.flight import FlightFare, ScrapeRun
+from app.services.ingest_service import bulk_insert_fares
+from app.services.query_service import history_query
+from app.services.summary_service import compute_daily_summary
+from app.services.triangle_service import _cells_select
+
+
+NEW_INDEXES = [
+    "idx_flight_fares_airline_trgm",
+    "idx_flight_fares_history",
+    "idx_flight_fares_run_success",
+    "idx_fare_summary_dod",
+    "idx_scrape_runs_route_status",
+]
+LEGACY_INDEXES = [
+    "CREATE INDEX idx_flight_fares_airline ON flight_fares (airline)",
+]
+
+SEED_ROUTES = ["BTH-CGK", "BTH-KNO", "BTH-SUB", "BTH-PDG", "TNJ-CGK"]
+SEED_AIRLINES = ["GARUDA INDONESIA", "CITILINK", "LION AIR", "SUPER AIR JET", "BATIK AIR"]
+
+
+# =============================================
+# Seed data sintetis
+# =============================================
+
+def seed(db: Session, rows: int, days: int = 60, fares_per_cell: int = 4):
+    """Isi run COMPLETED + flight_fares sintetis (+ summary) sampai ~`rows` baris."""
+    today = date.today()
+    per_run = days * len(SEED_AIRLINES) * fares_per_cell
+    n_runs = max(1, rows // per_run)
+    for i in range(n_runs):
+        route = SEED_ROUTES[i % len(SEED_ROUTES)]
+        scrape_dt = today - timedelta(days=i // len(SEED_ROUTES))
+        run = ScrapeRun(run_id=str(uuid.uuid4()), route=route, scrape_date=scrape_dt,
+                        status="COMPLETED", run_type="SCHEDULED",
+                        start_date=scrape_dt, end_date=scrape_dt + timedelta(days=days - 1))
+        db.add(run)
+        db.flush()
+
+        records = []
+        for d in range(days):
+            travel_dt = scrape_dt + timedelta(days=d)
+            for airline in SEED_AIRLINES:
+                for k in range(fares_per_cell):
+                    failed = random.random() < 0.05
+                    records.append({
+                        "run_id": run.run_id, "route": route, "airline": airline,
+                        "source": "garuda_api", "travel_date": travel_dt,
+                        "flight_number": f"XX{k:03d}", "depart_time": "08:00", "arrive_time": "10:00",
+                        "basic_fare": 0 if failed else random.randint(500, 3000) * 1000,
+                        "source_type": "airline",
+                        "status_scrape": "FAILED" if failed else "SUCCESS",
+                    })
+        bulk_insert_fares(db, records, scrape_date=scrape_dt)
+        compute_daily_summary(db, run.run_id, route, scrape_dt)
+        db.commit()
+        print(f"seed {i + 1}/{n_runs} run {route} {scrape_dt}")
+
+
+# =============================================
+# Benchmark
+# =============================================
+
+def _sql(query) -> str:
+    return str(query.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+
+
+def _queries(db: Session) -> dict[str, str]:
+    """Query representatif, parameter diambil dari data yang ada."""
+    route, = db.query(FlightFare.route).group_by(FlightFare.route).order_by(func.count().desc()).first()
+    run = db.query(ScrapeRun).filter(
+        ScrapeRun.route == route, ScrapeRun.status == "COMPLETED",
+    ).order_by(ScrapeRun.id.desc()).first()
+    airline, = db.query(FlightFare.airline).filter(FlightFare.route == route).first()
+    fragment = airline.split()[0][:4].lower()
+    mid_date = run.start_date + (run.end_date - run.start_date) / 2
+
+    return {
+        "history airline ILIKE": _sql(history_query(route=route, airline=fragment).limit(100)),
+        "history deep keyset": _sql(history_query(
+            route=route, after=[mid_date, 1_500_000, 0],
+        ).limit(100)),
+        "summary fares per run": (
+            "SELECT airline, travel_date, MIN(basic_fare), AVG(basic_fare) FROM flight_fares "
+            f"WHERE run_id = '{run.run_id}' AND status_scrape = 'SUCCESS' GROUP BY airline, travel_date"
+        ),
+        "summary DoD lookup": (
+            "SELECT s.daily_min_price FROM fare_daily_summary s "
+            f"WHERE s.route = '{route}' AND s.airline = '{airline}' AND s.travel_date = '{mid_date}' "
+            f"AND s.scrape_date < '{run.scrape_date}' ORDER BY s.scrape_date DESC LIMIT 1"
+        ),
+        "triangle refresh": _sql(_cells_select(route, run.scrape_date)),
+        "latest completed run": (
+            "SELECT run_id FROM scrape_runs "
+            f"WHERE route = '{route}' AND status = 'COMPLETED' ORDER BY id DESC LIMIT 1"
+        ),
+    }
+
+
+def _explain(db: Session, sql: str) -> tuple[float, list[str]]:
+    plan = [row[0] for row in db.execute(text(f"EXPLAIN (ANALYZE, BUFFERS) {sql}"))]
+    exec_ms = next(
+        (float(line.split(":")[1].split()[0]) for line in plan if line.startswith("Execution Time")), 0.0,
+    )
+    return exec_ms, plan
+
+
+def run_suite(db: Session, queries: dict[str, str], repeat: int) -> dict[str, tuple[float, list[str]]]:
+    results = {}
+    for name, sql in queries.items():
+        timings = []
+        plan: list[str] = []
+        for _ in range(repeat):
+            ms, plan = _explain(db, sql)
+            timings.append(ms)
+        results[name] = (min(timings), plan)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark index flight_fares / fare_daily_summary")
+    parser.add_argument("--seed", type=int, default=0, help="Tambah ~N baris flight_fares sintetis dulu")
+    parser.add_argument("--repeat", type=int, default=3, help="Ulangi tiap query, ambil waktu tercepat")
+    parser.add_argument("--verbose", action="store_true", help="Tampilkan plan lengkap")
+    args = parser.parse_args()
+
+    engine = create_engine(settings.DATABASE_URL)
+    if engine.dialect.name != "postgresql":
+        raise SystemExit("Benchmark index hanya untuk PostgreSQL")
+
+    with Session(engine) as db:
+        if args.seed:
+            seed(db, args.seed)
+
+    # VACUUM (visibility map) supaya index-only scan bisa dipakai
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text("VACUUM ANALYZE flight_fares, fare_daily_summary, scrape_runs"))
+
+    with Session(engine) as db:
+        queries = _queries(db)
+
+        # Sebelum: tanpa index baru (transaksi di-rollback)
+        for name in NEW_INDEXES:
+            db.execute(text(f"DROP INDEX IF EXISTS {name}"))
+        for ddl in LEGACY_INDEXES:
+            db.execute(text(ddl))
+        before = run_suite(db, queries, args.repeat)
+        db.rollback()
+
+        after = run_suite(db, queries, args.repeat)
+        db.rollback()
+
+    print(f"{'query':<26} {'before ms':>10} {'after ms':>10}  plan (after)")
+    for name in queries:
+        b_ms, b_plan = before[name]
+        a_ms, a_plan = after[name]
+        top = next((line.strip() for line in a_plan if "Scan" in line), a_plan[0].strip())
+        print(f"{name:<26} {b_ms:>10.2f} {a_ms:>10.2f}  {top[:90]}")
+        if args.verbose:
+            print("  -- before --")
+            print("\n".join(f"  {line}" for line in b_plan))
+            print("  -- after --")
+            print("\n".join(f"  {line}" for line in a_plan))
+            print()
+
+
+if __name__ == "__main__":
+    main()